@@ -0,0 +1,178 @@
+"""
+Benchmark for the redraw pipeline of ncgraph.
+
+The figures are drawn with a HeadlessRenderer, so no terminal is needed. For each combination of
+series length, number of series, terminal size and line mode, the following cases are measured:
+
+* redraw:       a complete Grapher.redraw() with all series rasterized again
+* cachedRedraw: Grapher.redraw() with the cached cells of the series (e.g. toggling the legend)
+* updateAxis:   Grapher.updateAxis() with automatic axis limits
+* nofit:        Mapping.nofit() for all samples of all series
+* mapLine:      the scalar Mapping.mapLine() for (at most) --segments connection lines per series
+* pan:          the key handlers for 'h' and 'l' (Grapher.moveleft() / moveright())
+* zoom:         the key handlers for 'a' and 'd' (Grapher.zoomoutx() / zoominx())
+
+The frame cache of the Grapher is cleared before each pan and zoom, so these cases measure the
+rasterization of the new view and not the lookup of a view which has been shown before.
+
+For each case, the time per call (minimum, median and maximum over --repeat calls, in
+milliseconds) and the peak memory allocated during one call (measured in a separate run with
+tracemalloc, in bytes) are reported as JSON, e.g.
+
+    python benchmark.py --lengths 1e3 1e5 --series 1 4 --sizes 80x24 --output bench_output.txt
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy
+
+import ncgraph
+
+CASES = ['redraw', 'cachedRedraw', 'updateAxis', 'nofit', 'mapLine', 'pan', 'zoom']
+
+"""
+Returns count example series of the given length: noisy sine waves with different frequencies.
+"""
+def makeSeries(length, count, seed=0):
+    random = numpy.random.default_rng(seed)
+    x = numpy.linspace(0, 100, length)
+    return [ncgraph.DataSeries(x, numpy.sin((i + 1) * x) + 0.1 * random.standard_normal(length), "series %i" % i)
+            for i in range(count)]
+
+def makeGrapher(seriesList, width, height, lines):
+    ax = ncgraph.Grapher(ncgraph.HeadlessRenderer(height, width))
+    ax.draw_lines = lines
+    for ds in seriesList:
+        ax.addSeries(ds, redraw=False)
+    ax.redraw()
+    return ax
+
+"""
+Returns a function which runs the given case once on the Grapher ax. Cases which alternate
+between two operations (e.g. moving left and right) do one of them per call so that the view
+does not drift away from the data.
+"""
+def makeCase(case, ax, segments):
+    if case == 'redraw':
+        def run():
+            ax.seriesLayerKey = None
+            ax.seriesCells = {}
+            ax.redraw()
+        return run
+    if case == 'cachedRedraw':
+        return ax.redraw
+    if case == 'updateAxis':
+        def run():
+            ax.autoAxis = True
+            ax.updateAxis()
+        return run
+    if case == 'nofit':
+        def run():
+            for ds in ax.seriesList:
+                ax.mapping.nofit(ds.X, ds.Y)
+        return run
+    if case == 'mapLine':
+        def run():
+            for ds in ax.seriesList:
+                X, Y = ds.X[:segments+1].tolist(), ds.Y[:segments+1].tolist()
+                for i in range(len(X) - 1):
+                    ax.mapping.mapLine(X[i], Y[i], X[i+1], Y[i+1])
+        return run
+    operations = {'pan': (ax.moveright, ax.moveleft), 'zoom': (ax.zoominx, ax.zoomoutx)}[case]
+    calls = [0]
+    def run():
+        # Otherwise, every view but the first would be taken from the frame cache
+        ax.frameCache.clear()
+        operations[calls[0] % 2]()
+        calls[0] += 1
+    return run
+
+def measure(run, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'min_ms': 1000 * min(times),
+        'median_ms': 1000 * statistics.median(times),
+        'max_ms': 1000 * max(times),
+        'peak_bytes': peak,
+    }
+
+def parseSize(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the redraw pipeline of ncgraph.")
+    parser.add_argument('--lengths', type=float, nargs='+', default=[1e3, 1e4, 1e5, 1e6, 1e7],
+            help="samples per series")
+    parser.add_argument('--series', type=int, nargs='+', default=[1, 4], help="numbers of series")
+    parser.add_argument('--sizes', type=parseSize, nargs='+', default=[(80, 24), (200, 60)],
+            help="terminal sizes as WIDTHxHEIGHT")
+    parser.add_argument('--lines', choices=['on', 'off', 'both'], default='both',
+            help="draw connection lines")
+    parser.add_argument('--cases', choices=CASES, nargs='+', default=CASES)
+    parser.add_argument('--repeat', type=int, default=5, help="calls per case")
+    parser.add_argument('--segments', type=int, default=1000,
+            help="connection lines per series for the mapLine case")
+    parser.add_argument('--max-points', type=float, default=2e7,
+            help="skip combinations with more samples in total")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    lines = {'on': [True], 'off': [False], 'both': [True, False]}[args.lines]
+    results = []
+    for length in [int(length) for length in args.lengths]:
+        for count in args.series:
+            if length * count > args.max_points:
+                print("Skipping %i x %i samples" % (count, length), file=sys.stderr)
+                continue
+            start = time.perf_counter()
+            seriesList = makeSeries(length, count)
+            setup = time.perf_counter() - start
+            for width, height in args.sizes:
+                for drawLines in lines:
+                    for case in args.cases:
+                        ax = makeGrapher(seriesList, width, height, drawLines)
+                        result = {
+                            'case': case,
+                            'length': length,
+                            'series': count,
+                            'width': width,
+                            'height': height,
+                            'lines': drawLines,
+                            'setup_ms': 1000 * setup,
+                        }
+                        result.update(measure(makeCase(case, ax, args.segments), args.repeat))
+                        results.append(result)
+                        print("%-10s %9i x %i %4ix%-3i lines=%-5s %10.2f ms" % (case, length, count,
+                            width, height, drawLines, result['median_ms']), file=sys.stderr)
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'platform': platform.platform(),
+        },
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+
+if __name__ == '__main__':
+    main()
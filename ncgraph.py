@@ -1,25 +1,788 @@
+import argparse
+import concurrent.futures
 import curses
+import io
 import math
 import numpy
+import os
+import select
+import sys
+import time
 
 # Just for reference: Unicode box-drawing characters
 # ─│┌┐└┘├┤┬┴┼
 
 LEFTBORDER = 7
 BOTTOMBORDER = 2
+# Maximum number of redraws per second due to new data while a Figure is shown
+MAXFPS = 25
 
-debug_file = open("debug.output", 'w')
-def DEBUG(string):
-    debug_file.write("%s\n" % string)
+# Braille characters (U+2800 to U+28FF) have 2x4 dots per cell. The dot in sub-row r and sub-column
+# c of a cell is the bit BRAILLE_DOTS[r, c] of the character's offset from U+2800.
+BRAILLE_DOTS = numpy.array([[0x01, 0x08], [0x02, 0x10], [0x04, 0x20], [0x40, 0x80]], dtype=numpy.uint8)
+BRAILLE_CHARS = numpy.array([chr(0x2800 + i) for i in range(256)])
 
+# Debug messages are only written after setDebugOutput() has been called, e.g. by setting the
+# environment variable NCGRAPH_DEBUG to a filename. The message is only formatted (string % args)
+# if it is written so that disabled DEBUG() calls cost (almost) nothing.
+debug_file = None
+def setDebugOutput(filename):
+    global debug_file
+    if debug_file is not None:
+        debug_file.close()
+    debug_file = None if filename is None else open(filename, 'w')
+
+def DEBUG(string, *args):
+    if debug_file is not None:
+        debug_file.write("%s\n" % (string % args if args else string))
+
+if os.environ.get("NCGRAPH_DEBUG"):
+    setDebugOutput(os.environ["NCGRAPH_DEBUG"])
+
+# Number of threads which decimate and rasterize the data series of a Grapher in parallel (see
+# Grapher.mapSeries()). With 1, the series are processed one after another.
+THREADS = os.cpu_count() or 1
+thread_pool = None
+def threadPool():
+    global thread_pool
+    if thread_pool is None:
+        thread_pool = concurrent.futures.ThreadPoolExecutor(THREADS)
+    return thread_pool
+
+# Number of views whose rasterized series are kept by a Grapher, including the views which are
+# prefetched in the background while a figure is shown (see Grapher.prefetch()).
+FRAME_CACHE = 16
+prefetch_pool = None
+def prefetchPool():
+    global prefetch_pool
+    if prefetch_pool is None:
+        prefetch_pool = concurrent.futures.ThreadPoolExecutor(1)
+    return prefetch_pool
+
+# Glyphs for the number of samples per cell of a series with the 'density' style, from a single
+# sample to the maximum number of samples in a cell (on a logarithmic scale).
+DENSITY_GLYPHS = numpy.array(list(".:-=+*#%@"))
+
+# Number of times the sampling of a FunctionSeries is refined where a straight line between two
+# samples would be off by more than half a bin.
+FUNCTION_REFINEMENTS = 8
+# Number of views for which the samples of a FunctionSeries are kept
+FUNCTION_VIEWS = 16
+
+# Number of samples in the smallest bucket of a level-of-detail Pyramid. Series with less samples
+# than a few buckets are always plotted directly.
+LOD_BUCKETSIZE = 8
+# As the buckets do not respect the column borders, a column has to span several buckets so that
+# the plot looks like the plot of all samples.
+LOD_BUCKETSPERCOLUMN = 4
+
+# Up to this number of visible samples per column, the points of a series are drawn at all of them
+# instead of only at the decimated samples, see Grapher.decimate()
+EXACT_MARKS_PER_COLUMN = 64
+
+# Number of buckets per row and column of a GridIndex
+GRID_INDEX_SIZE = 256
+
+# Number of rows into which the y range of a series has to be resolvable if its values are
+# stored with less precision (see Figure.storedType()). This covers the braille dots of very tall
+# terminals.
+PRECISION_ROWS = 1000
+
+# Number of samples which are processed at once when a whole series is scanned, e.g. to build its
+# Pyramid. This bounds the temporary memory for series which are memory mapped from big files.
+CHUNKSIZE = 1 << 20
+
+"""
+A plotted series of samples X, Y. The style determines how it is drawn:
+* 'lines':   markers at the samples which are connected by lines (see Grapher.toggleLines())
+* 'step':    like 'lines' but each value is held until the next sample, e.g. for digital signals
+             recorded as edges (see interrupts2signal())
+* 'density': the number of samples in each cell is shown by DENSITY_GLYPHS, e.g. for big clouds
+             of points which would just fill the drawing area with markers
+The Y values are stored with the given ydtype (by default, the type of Y is kept). With
+numpy.float32, they take half the memory of float64 values and still have about 7 significant
+digits, which is more than the rows of a terminal can resolve unless the values are huge
+compared to their range. Figure.plot() keeps the type of Y then (see Figure.storedType()).
+"""
 class DataSeries(object):
-    def __init__(self, X, Y, label, color=0):
+    STYLES = ('lines', 'step', 'density')
+    # There might be many series with lots of samples, but each of them has only a few attributes
+    __slots__ = ('label', 'color', 'style', 'lod', 'pyramid', 'gridIndex', 'prefix', 'version',
+            'cachedBounds', 'xsorted', 'capacity', 'X', 'Y', 'xbuffer', 'ybuffer', 'length', 'appended')
+
+    def __init__(self, X, Y, label, color=0, lod=True, xsorted=None, capacity=None, copy=True, style='lines', ydtype=None):
         assert (len(X) == len(Y))
-        self.X = X.copy()
-        self.Y = Y.copy()
+        if style not in self.STYLES:
+            raise ValueError("Unknown style %r" % (style,))
         self.label = label
-        self.length = len(X)
         self.color = color
+        self.style = style
+        # The density of the samples can not be determined from a Pyramid
+        self.lod = lod and style != 'density'
+        self.pyramid = None
+        # (version, GridIndex) for looking up the nearest sample, see nearest()
+        self.gridIndex = None
+        # (version, first sample number, sums, squares, counts), see prefixSums()
+        self.prefix = None
+        # Incremented whenever the data of the series changes
+        self.version = 0
+        # (x_min, x_max, y_min, y_max) of the data, see bounds()
+        self.cachedBounds = None
+        # Most series are time series with increasing X values. This allows to find the visible
+        # samples by binary search. If the caller does not know, we check it once here.
+        if xsorted is None:
+            xsorted = self.isSorted(X)
+        self.xsorted = xsorted
+        # With a capacity, the series is a ring buffer which keeps the last capacity samples only.
+        # Each sample is stored twice, at position p and p+capacity, so that the current samples
+        # are always available as contiguous views X and Y of the buffers.
+        # Without copy, the series keeps references to the given arrays (e.g. numpy.memmap views of
+        # a file, see memmapColumns()) which must not be changed afterwards. Y is only copied
+        # without copy if it has to be converted to ydtype.
+        self.capacity = capacity
+        if capacity is None:
+            self.X = numpy.array(X) if copy else numpy.asarray(X)
+            self.Y = numpy.array(Y, dtype=ydtype) if copy else numpy.asarray(Y, dtype=ydtype)
+            self.length = len(X)
+            self.appended = self.length
+        else:
+            self.xbuffer = numpy.empty(2 * capacity)
+            self.ybuffer = numpy.empty(2 * capacity, dtype=ydtype)
+            self.X = self.xbuffer[0:0]
+            self.Y = self.ybuffer[0:0]
+            self.length = 0
+            self.appended = 0
+            self.extend(X, Y)
+        if self.lod and self.pyramid is None:
+            self.buildPyramid()
+
+    """
+    Builds the level-of-detail Pyramid for this series. This only works for series with
+    increasing X values as only then, the buckets of the pyramid correspond to ranges of X.
+    """
+    def buildPyramid(self):
+        self.pyramid = None
+        if self.length < 4 * LOD_BUCKETSIZE or not self.xsorted:
+            return
+        self.pyramid = Pyramid(self.Y, self.appended - self.length)
+
+    """
+    Appends the samples x, y to the series. For ring buffer series, the oldest samples are
+    dropped if the capacity is exceeded. The level-of-detail Pyramid is only updated for the
+    new and dropped samples.
+    """
+    def extend(self, x, y):
+        x = numpy.asarray(x).ravel()
+        y = numpy.asarray(y).ravel()
+        assert (len(x) == len(y))
+        if len(x) == 0:
+            return
+        # The samples are stored (and the bounds reduced) in the type of the series (see Figure.storedType())
+        y = y.astype(self.Y.dtype, copy=False)
+        if self.xsorted and ((self.length and x[0] < self.X[-1]) or not self.isSorted(x)):
+            self.xsorted = False
+            self.pyramid = None
+            self.cachedBounds = None
+        # The new samples can only widen the cached bounds. The dropped samples of a ring buffer
+        # only matter if they could have been an extremum, then the bounds are recomputed lazily.
+        if self.cachedBounds is not None and self.capacity is not None:
+            dropped = self.length + len(x) - self.capacity
+            if dropped > self.length:
+                self.cachedBounds = None
+            elif dropped > 0:
+                old = self.reduceBounds(self.X[:dropped], self.Y[:dropped])
+                xmin, xmax, ymin, ymax = self.cachedBounds
+                if not ((self.xsorted or (old[0] > xmin and old[1] < xmax)) and old[2] > ymin and old[3] < ymax):
+                    self.cachedBounds = None
+        if self.cachedBounds is not None:
+            new = self.reduceBounds(x, y)
+            self.cachedBounds = (min(self.cachedBounds[0], new[0]), max(self.cachedBounds[1], new[1]),
+                    min(self.cachedBounds[2], new[2]), max(self.cachedBounds[3], new[3]))
+        since = self.appended
+        if self.capacity is None:
+            self.X = numpy.concatenate((self.X, x))
+            self.Y = numpy.concatenate((self.Y, y))
+            self.length += len(x)
+            self.appended += len(x)
+        else:
+            # Samples which would be dropped immediately are not written at all
+            self.appended += len(x) - len(x[-self.capacity:])
+            x, y = x[-self.capacity:], y[-self.capacity:]
+            positions = (self.appended + numpy.arange(len(x))) % self.capacity
+            for offset in (0, self.capacity):
+                self.xbuffer[positions + offset] = x
+                self.ybuffer[positions + offset] = y
+            self.appended += len(x)
+            self.length = min(self.length + len(x), self.capacity)
+            start = (self.appended - self.length) % self.capacity
+            self.X = self.xbuffer[start:start+self.length]
+            self.Y = self.ybuffer[start:start+self.length]
+        if self.pyramid is not None:
+            self.pyramid.update(self.Y, self.appended - self.length, since)
+        elif self.lod and self.xsorted and self.length >= 4 * LOD_BUCKETSIZE:
+            self.buildPyramid()
+        self.version += 1
+
+    """
+    Returns (x_min, x_max, y_min, y_max) of the data or None for an empty series. The bounds are
+    only computed once and then kept up to date by extend().
+    """
+    def bounds(self):
+        if self.length == 0:
+            return None
+        if self.cachedBounds is None:
+            self.cachedBounds = self.reduceBounds(self.X, self.Y)
+        xmin, xmax, ymin, ymax = self.cachedBounds
+        if self.xsorted:
+            xmin, xmax = float(self.X[0]), float(self.X[-1])
+        return xmin, xmax, ymin, ymax
+
+    """
+    Checks if the values X are increasing. The values are compared chunk by chunk so that big
+    memory mapped series are not compared as a whole.
+    """
+    @staticmethod
+    def isSorted(X):
+        for start in range(0, len(X) - 1, CHUNKSIZE):
+            chunk = X[start:start+CHUNKSIZE+1]
+            if not numpy.all(chunk[1:] >= chunk[:-1]):
+                return False
+        return True
+
+    """
+    Vectorized minimum and maximum of X and Y, ignoring NaNs.
+    """
+    @staticmethod
+    def reduceBounds(X, Y):
+        return (float(numpy.fmin.reduce(X)), float(numpy.fmax.reduce(X)),
+                float(numpy.fmin.reduce(Y)), float(numpy.fmax.reduce(Y)))
+
+    """
+    For series with increasing X values, returns the range start:stop of the samples which are
+    visible with the given mapping plus one neighbour on each side so that the connection lines
+    leaving the drawing area are still drawn. For other series, this is just the whole series.
+    """
+    def visibleRange(self, mapping):
+        if not self.xsorted:
+            return 0, self.length
+        left, right = sorted((mapping.x_from, mapping.x_to))
+        start = max(numpy.searchsorted(self.X, left, side='left') - 1, 0)
+        stop = min(numpy.searchsorted(self.X, right, side='right') + 1, self.length)
+        return int(start), int(stop)
+
+    """
+    Returns the X and Y values which are necessary to draw this series with the given mapping
+    and their column runs for Mapping.decimate() (None if they are not known).
+    With a Pyramid, these are the precomputed first, minimum, maximum and last samples of the
+    biggest buckets which still resolve a single column of the mapping.
+    Otherwise, these are just all visible samples. If a mapping cull is given, only the samples
+    which are visible with cull are considered.
+    For increasing X values, the runs are determined from the indexes of the samples which start
+    a new column. These are returned by columnStarts(start, stop) if it is given (e.g. to share
+    them with other series with the same X values), by Mapping.columnStarts() otherwise.
+    """
+    def viewData(self, mapping, cull=None, columnStarts=None):
+        start, stop = self.visibleRange(mapping if cull is None else cull)
+        if not self.xsorted:
+            return self.X[start:stop], self.Y[start:stop], None
+        if columnStarts is None:
+            splits = mapping.columnStarts(self.X, start, stop)
+        else:
+            splits = columnStarts(start, stop)
+        if self.pyramid is not None and stop - start > 1 and self.X[stop-1] > self.X[start]:
+            samplesPerColumn = (stop - start - 1) / (self.X[stop-1] - self.X[start]) / abs(mapping.hbins_per_x)
+            indexes = self.pyramid.indexes(samplesPerColumn / LOD_BUCKETSPERCOLUMN, start, stop, splits)
+            if indexes is not None:
+                columns = numpy.searchsorted(splits, indexes, side='right')
+                starts = numpy.flatnonzero(numpy.concatenate(([True], columns[1:] != columns[:-1])))
+                return self.X[indexes], self.Y[indexes], Mapping.runs(starts, len(indexes))
+        return self.X[start:stop], self.Y[start:stop], Mapping.runs(numpy.append(0, splits - start), stop - start)
+
+    """
+    Returns all X and Y values of this series which are visible with the given mapping (or with
+    the mapping cull if it is given), i.e. the samples which viewData() is decimated from.
+    """
+    def visibleData(self, mapping, cull=None):
+        start, stop = self.visibleRange(mapping if cull is None else cull)
+        return self.X[start:stop], self.Y[start:stop]
+
+    """
+    Returns the sample (x, y) which is nearest to the point x, y with the given mapping or None
+    for an empty series. For series with increasing X values (except 'density' series), this is
+    the sample at x, i.e. the nearest one in x or, for 'step' series, the last one up to x. For
+    other series, this is the nearest sample in the drawing area which is looked up in a
+    GridIndex. The index is built once for the current data.
+    """
+    def nearest(self, x, y, mapping):
+        if self.length == 0:
+            return None
+        if self.xsorted and self.style != 'density':
+            i = int(numpy.searchsorted(self.X, x, side='right'))
+            if self.style == 'step' or i == self.length:
+                i = max(i - 1, 0)
+            elif i > 0 and x - self.X[i-1] <= self.X[i] - x:
+                i -= 1
+        else:
+            if self.gridIndex is None or self.gridIndex[0] != self.version:
+                self.gridIndex = (self.version, GridIndex(self.X, self.Y))
+            i = self.gridIndex[1].nearest(self.X, self.Y, x, y, abs(mapping.hbins_per_x), abs(mapping.vbins_per_y))
+            if i is None:
+                return None
+        return float(self.X[i]), float(self.Y[i])
+
+    """
+    Returns the number, minimum, maximum, mean and root mean square of the finite values Y of the
+    samples with x_from <= X <= x_to, or None if there are none. For series with increasing X
+    values, this does not depend on the number of samples in the range: The sums are taken from
+    prefixSums() and the extrema from the level-of-detail Pyramid (if the series has one). Other
+    series are scanned.
+    """
+    def statistics(self, x_from, x_to):
+        left, right = sorted((x_from, x_to))
+        if not self.xsorted:
+            Y = self.Y[(self.X >= left) & (self.X <= right)]
+            return self.summarize(Y[numpy.isfinite(Y)])
+        start = int(numpy.searchsorted(self.X, left, side='left'))
+        stop = int(numpy.searchsorted(self.X, right, side='right'))
+        sums, squares, counts = self.prefixSums()
+        count = int(counts[stop] - counts[start])
+        if count == 0:
+            return None
+        if self.pyramid is None:
+            Y = self.Y[start:stop]
+            ymin, ymax = numpy.fmin.reduce(Y), numpy.fmax.reduce(Y)
+        else:
+            imin, imax = self.pyramid.extrema(self.Y, start, stop)
+            ymin, ymax = self.Y[imin], self.Y[imax]
+        mean = (sums[stop] - sums[start]) / count
+        meanSquare = (squares[stop] - squares[start]) / count
+        return count, float(ymin), float(ymax), float(mean), math.sqrt(max(meanSquare, 0))
+
+    @staticmethod
+    def summarize(Y):
+        if len(Y) == 0:
+            return None
+        Y = Y.astype(numpy.float64, copy=False)
+        return len(Y), float(Y.min()), float(Y.max()), float(Y.mean()), math.sqrt(numpy.dot(Y, Y) / len(Y))
+
+    """
+    Returns the prefix sums of the finite values Y, of their squares and of their number (arrays
+    of length+1), so that e.g. the sum of the samples start:stop is sums[stop] - sums[start]. They
+    are only computed for the samples which have been added since the last call.
+    """
+    def prefixSums(self):
+        first = self.appended - self.length
+        if self.prefix is not None and self.prefix[0] == self.version:
+            return self.prefix[2:]
+        if self.prefix is not None and self.prefix[1] <= first <= self.prefix[1] + len(self.prefix[2]) - 1:
+            # Only samples have been appended (and dropped from the start of a ring buffer)
+            _, oldFirst, *old = self.prefix
+            dropped = first - oldFirst
+            if dropped:
+                old = [array[dropped:] - array[dropped] for array in old]
+            new = self.Y[len(old[0]) - 1:]
+        else:
+            old = [numpy.zeros(1), numpy.zeros(1), numpy.zeros(1, dtype=numpy.intp)]
+            new = self.Y
+        finite = numpy.isfinite(new)
+        values = numpy.where(finite, new, 0).astype(numpy.float64, copy=False)
+        sums, squares, counts = [numpy.concatenate((array, array[-1] + numpy.cumsum(added)))
+                for array, added in zip(old, (values, values * values, finite))]
+        self.prefix = (self.version, first, sums, squares, counts)
+        return sums, squares, counts
+
+    """
+    Returns the number of bytes of memory which are taken by the arrays of this series: the
+    samples, the level-of-detail Pyramid and the indexes for nearest() and statistics(). Arrays of
+    memory mapped files do not count. Arrays which are shared with other series (see
+    Figure.plot()) count for each series, see Figure.footprint().
+    """
+    def footprint(self):
+        return sum(array.nbytes for array in self.arrays().values())
+
+    """
+    Returns the arrays of this series which take memory (see footprint()) by their ids. Views are
+    replaced by the arrays they belong to.
+    """
+    def arrays(self):
+        arrays = [self.X, self.Y]
+        if self.pyramid is not None:
+            for _, _, mins, maxs in self.pyramid.levels:
+                arrays += [mins, maxs]
+        if self.gridIndex is not None:
+            arrays += [self.gridIndex[1].order, self.gridIndex[1].starts]
+        if self.prefix is not None:
+            arrays += self.prefix[2:]
+        owners = {}
+        for array in arrays:
+            owner = array if array.base is None else array.base
+            if isinstance(owner, numpy.ndarray) and not isinstance(owner, numpy.memmap):
+                owners[id(owner)] = owner
+        return owners
+
+"""
+A series which is given by a vectorized function y = function(x) instead of samples. The function
+is sampled for each view at the resolution of the mapping (one sample per bin) and the sampling
+is refined where the function is curved (see sample()). The samples of the last FUNCTION_VIEWS
+views are kept so that redrawing the same view does not evaluate the function again.
+The function is only evaluated between x_min and x_max if they are given. Only then, the series
+has bounds and takes part in the automatic axis limits.
+"""
+class FunctionSeries(DataSeries):
+    __slots__ = ('function', 'x_min', 'x_max', 'views')
+
+    def __init__(self, function, label, color=0, x_min=None, x_max=None, style='lines'):
+        if style == 'density':
+            raise ValueError("The density of a function is not defined")
+        DataSeries.__init__(self, numpy.empty(0), numpy.empty(0), label, color, lod=False, xsorted=True, style=style)
+        self.function = function
+        self.x_min = -numpy.inf if x_min is None else x_min
+        self.x_max = numpy.inf if x_max is None else x_max
+        self.views = {}
+
+    def extend(self, x, y):
+        raise TypeError("A FunctionSeries can not be extended")
+
+    """
+    Returns the statistics like DataSeries.statistics() for 1001 equally spaced samples of the
+    function between x_from and x_to (within its domain).
+    """
+    def statistics(self, x_from, x_to):
+        left, right = max(min(x_from, x_to), self.x_min), min(max(x_from, x_to), self.x_max)
+        if left > right:
+            return None
+        Y = self.evaluate(numpy.linspace(left, right, 1001))
+        return self.summarize(Y[numpy.isfinite(Y)])
+
+    """
+    Returns the point of the function at x (None outside of its domain).
+    """
+    def nearest(self, x, y, mapping):
+        if not self.x_min <= x <= self.x_max:
+            return None
+        return x, float(self.evaluate(numpy.array([x]))[0])
+
+    def evaluate(self, X):
+        with numpy.errstate(all='ignore'):
+            return numpy.broadcast_to(numpy.asarray(self.function(X), dtype=float), X.shape)
+
+    def bounds(self):
+        if not (numpy.isfinite(self.x_min) and numpy.isfinite(self.x_max)):
+            return None
+        if self.cachedBounds is None:
+            X = numpy.linspace(self.x_min, self.x_max, 1001)
+            Y = self.evaluate(X)
+            # Poles and ends of the domain (e.g. of numpy.log at 0) do not bound the function
+            finite = numpy.isfinite(Y)
+            if finite.any():
+                self.cachedBounds = self.reduceBounds(X, Y[finite])
+            else:
+                self.cachedBounds = (self.x_min, self.x_max, math.nan, math.nan)
+        return self.cachedBounds
+
+    def viewData(self, mapping, cull=None, columnStarts=None):
+        limits = mapping if cull is None else cull
+        key = (mapping.x_from, mapping.x_to, mapping.hbin_from, mapping.hbin_to, mapping.y_from,
+                mapping.y_to, mapping.vbin_from, mapping.vbin_to, limits.x_from, limits.x_to)
+        if key not in self.views:
+            if len(self.views) >= FUNCTION_VIEWS:
+                del self.views[next(iter(self.views))]
+            self.views[key] = self.sample(mapping, *sorted((limits.x_from, limits.x_to)))
+        # The samples are returned directly as another view might be sampled meanwhile by the
+        # prefetch thread (see Grapher.prefetch())
+        X, Y = self.views[key]
+        self.X, self.Y, self.length = X, Y, len(X)
+        return X, Y, None
+
+    # The samples of the view are all samples there are
+    def visibleData(self, mapping, cull=None):
+        return self.viewData(mapping, cull)[:2]
+
+    """
+    Samples the function between left and right at the x-values of the bins of the mapping (plus
+    one bin on each side so that the lines leave the drawing area). Then, each interval between
+    two samples whose midpoint is more than half a bin off the straight line between them (or
+    which has an undefined end) is halved, up to FUNCTION_REFINEMENTS times.
+    """
+    def sample(self, mapping, left, right):
+        hleft, hright = sorted((mapping.mapx(left, rounding=False), mapping.mapx(right, rounding=False)))
+        bins = numpy.arange(math.floor(hleft) - 1, math.ceil(hright) + 2)
+        X = numpy.sort((bins - mapping.hbin_from) / mapping.hbins_per_x + mapping.x_from)
+        inside = (X >= self.x_min) & (X <= self.x_max)
+        ends = [x for x in (self.x_min, self.x_max) if X[0] < x < X[-1]]
+        X = numpy.union1d(X[inside], ends)
+        if len(X) < 2:
+            return X, self.evaluate(X)
+        Y = self.evaluate(X)
+        # Indexes of the intervals X[i]..X[i+1] which might have to be refined
+        intervals = numpy.arange(len(X) - 1)
+        for _ in range(FUNCTION_REFINEMENTS):
+            midX = (X[intervals] + X[intervals+1]) / 2
+            midY = self.evaluate(midX)
+            deviation = numpy.abs((midY - (Y[intervals] + Y[intervals+1]) / 2) * mapping.vbins_per_y)
+            undefined = numpy.isnan(Y[intervals]) | numpy.isnan(Y[intervals+1]) | numpy.isnan(midY)
+            defined = ~(numpy.isnan(Y[intervals]) & numpy.isnan(Y[intervals+1]) & numpy.isnan(midY))
+            refine = ((deviation > .5) | undefined) & defined
+            if not refine.any():
+                break
+            intervals, midX, midY = intervals[refine], midX[refine], midY[refine]
+            X = numpy.insert(X, intervals + 1, midX)
+            Y = numpy.insert(Y, intervals + 1, midY)
+            # Interval i has been split into the intervals starting at its new position and the
+            # inserted midpoint. All intervals before have been moved by the insertions before.
+            starts = intervals + numpy.arange(len(intervals))
+            intervals = numpy.stack((starts, starts + 1), axis=1).ravel()
+        return X, Y
+
+"""
+Level-of-detail pyramid for the values Y of a DataSeries: For bucket sizes of LOD_BUCKETSIZE,
+2*LOD_BUCKETSIZE, 4*LOD_BUCKETSIZE, ... samples, the indexes of the minimum and maximum value of
+each bucket are precomputed. Each level is computed from the level below, so building the whole
+pyramid is in O(n). As only the offsets of the samples within their buckets are kept (see
+encode()), it needs less than a byte per sample.
+The buckets are aligned to absolute sample numbers, i.e. the number of samples which have been
+appended to a series before, so that appending samples to a series or dropping samples from the
+start of a ring buffer only requires to recompute the buckets at both ends (see update()).
+"""
+class Pyramid(object):
+    def __init__(self, Y, first=0):
+        self.levels = []
+        self.update(Y, first, first)
+
+    """
+    Updates the pyramid for the samples Y, the first of which has the absolute sample number first.
+    The buckets of all samples with absolute numbers since and above are recomputed. The buckets
+    before the first sample are dropped.
+    """
+    def update(self, Y, first, since):
+        self.first = first
+        self.total = first + len(Y)
+        if len(Y) == 0:
+            self.levels = []
+            return
+        k = 0
+        while True:
+            size = LOD_BUCKETSIZE << k
+            firstBucket = first // size
+            lastBucket = (self.total - 1) // size
+            # The first bucket is always recomputed as some of its samples might have been dropped.
+            # Of the existing buckets, only the ones which do not contain new samples are kept.
+            if k < len(self.levels):
+                _, oldFirstBucket, oldMins, oldMaxs = self.levels[k]
+                changed = max(since // size, firstBucket + 1)
+                keptMins = oldMins[firstBucket+1-oldFirstBucket:changed-oldFirstBucket]
+                keptMaxs = oldMaxs[firstBucket+1-oldFirstBucket:changed-oldFirstBucket]
+            else:
+                changed = firstBucket + 1
+                keptMins = keptMaxs = numpy.arange(0, dtype=numpy.min_scalar_type(size - 1))
+            buckets = numpy.append(firstBucket, numpy.arange(changed, lastBucket + 1))
+            if k == 0:
+                mins, maxs = self.fromSamples(Y, buckets, size)
+            else:
+                mins, maxs = self.fromLevel(Y, buckets, self.levels[k-1])
+            mins, maxs = self.encode(mins, buckets, size), self.encode(maxs, buckets, size)
+            mins = numpy.concatenate((mins[:1], keptMins, mins[1:]))
+            maxs = numpy.concatenate((maxs[:1], keptMaxs, maxs[1:]))
+            level = (size, firstBucket, mins, maxs)
+            if k < len(self.levels):
+                self.levels[k] = level
+            else:
+                self.levels.append(level)
+            k += 1
+            # Further levels are only needed as long as there is something left to merge
+            if lastBucket == firstBucket:
+                del self.levels[k:]
+                return
+
+    """
+    The levels only keep the offsets of the minimum and maximum samples from the start of their
+    buckets. These fit into the smallest unsigned integer type for the bucket size, e.g. a byte
+    for the lower levels, which take most of the memory.
+    """
+    @staticmethod
+    def encode(indexes, buckets, size):
+        return (indexes - buckets * size).astype(numpy.min_scalar_type(size - 1))
+
+    """
+    Returns the absolute sample numbers of the minimum or maximum samples (offsets) of the given
+    buckets of a level with firstBucket and size.
+    """
+    @staticmethod
+    def decode(offsets, buckets, firstBucket, size):
+        return offsets[buckets - firstBucket] + buckets * size
+
+    """
+    Returns the values of the samples with the absolute numbers indexes. NaNs are replaced by
+    fill so that they are neither a minimum nor a maximum.
+    """
+    def values(self, Y, indexes, fill):
+        values = Y[indexes - self.first]
+        return numpy.where(numpy.isnan(values), fill, values)
+
+    """
+    Determines the minimum and maximum indexes of the given buckets directly from the samples.
+    For incomplete buckets at the start or end, the first or last sample is repeated.
+    The buckets are processed in chunks of about CHUNKSIZE samples.
+    """
+    def fromSamples(self, Y, buckets, size):
+        mins = numpy.empty(len(buckets), dtype=numpy.intp)
+        maxs = numpy.empty(len(buckets), dtype=numpy.intp)
+        step = max(CHUNKSIZE // size, 1)
+        for start in range(0, len(buckets), step):
+            chunk = buckets[start:start+step]
+            indexes = chunk.reshape(-1, 1) * size + numpy.arange(size)
+            indexes = numpy.clip(indexes, self.first, self.total - 1)
+            rows = numpy.arange(len(chunk))
+            mins[start:start+step] = indexes[rows, numpy.argmin(self.values(Y, indexes, numpy.inf), axis=1)]
+            maxs[start:start+step] = indexes[rows, numpy.argmax(self.values(Y, indexes, -numpy.inf), axis=1)]
+        return mins, maxs
+
+    """
+    Determines the minimum and maximum indexes of the given buckets by merging the two
+    corresponding buckets of the level below. If one of them does not exist (at the start or end),
+    the other one is used twice.
+    """
+    def fromLevel(self, Y, buckets, below):
+        size, firstBucket, belowMins, belowMaxs = below
+        left = numpy.clip(2 * buckets, firstBucket, firstBucket + len(belowMins) - 1)
+        right = numpy.clip(2 * buckets + 1, firstBucket, firstBucket + len(belowMins) - 1)
+        a, b = self.decode(belowMins, left, firstBucket, size), self.decode(belowMins, right, firstBucket, size)
+        mins = numpy.where(self.values(Y, b, numpy.inf) < self.values(Y, a, numpy.inf), b, a)
+        a, b = self.decode(belowMaxs, left, firstBucket, size), self.decode(belowMaxs, right, firstBucket, size)
+        maxs = numpy.where(self.values(Y, b, -numpy.inf) > self.values(Y, a, -numpy.inf), b, a)
+        return mins, maxs
+
+    """
+    Returns the indexes of the minimum and maximum of the samples start:stop (indexes into the
+    current samples like indexes()). Like in a segment tree, the range is covered by the biggest
+    buckets which fit into it, so at most two buckets per level and 2*LOD_BUCKETSIZE samples at
+    the ends are compared.
+    """
+    def extrema(self, Y, start, stop):
+        a, b = self.first + start, self.first + stop
+        lo, hi = -(-a // LOD_BUCKETSIZE), b // LOD_BUCKETSIZE
+        if lo >= hi:
+            samples = numpy.arange(a, b)
+            mins, maxs = [samples], [samples]
+        else:
+            samples = numpy.concatenate((numpy.arange(a, lo * LOD_BUCKETSIZE), numpy.arange(hi * LOD_BUCKETSIZE, b)))
+            mins, maxs = [samples], [samples]
+            for k, (size, firstBucket, levelMins, levelMaxs) in enumerate(self.levels):
+                if lo >= hi:
+                    break
+                if k == len(self.levels) - 1:
+                    buckets = numpy.arange(lo, hi)
+                else:
+                    # Odd buckets at the ends can not be merged with their neighbours
+                    buckets = []
+                    if lo % 2:
+                        buckets.append(lo)
+                        lo += 1
+                    if hi % 2 and lo < hi:
+                        hi -= 1
+                        buckets.append(hi)
+                    buckets = numpy.array(buckets, dtype=numpy.intp)
+                mins.append(self.decode(levelMins, buckets, firstBucket, size))
+                maxs.append(self.decode(levelMaxs, buckets, firstBucket, size))
+                lo, hi = lo // 2, hi // 2
+        mins, maxs = numpy.concatenate(mins), numpy.concatenate(maxs)
+        imin = mins[numpy.argmin(self.values(Y, mins, numpy.inf))]
+        imax = maxs[numpy.argmax(self.values(Y, maxs, -numpy.inf))]
+        return int(imin) - self.first, int(imax) - self.first
+
+    """
+    Returns the (increasing) indexes of the first, minimum, maximum and last sample of all
+    buckets of the coarsest level with not more than maxSize samples per bucket within the
+    samples start:stop. Here, the indexes are not absolute sample numbers but indexes into the
+    current samples of the series. If there is no such level, None is returned.
+    The samples at the (increasing) indexes splits start new columns (see Mapping.columnStarts()).
+    Buckets which contain the start of a column (or start or stop) are replaced by their halves
+    from the level below, down to the samples themselves, so each bucket lies within one column
+    and the first, minimum, maximum and last sample of each column are kept like by
+    Mapping.decimate().
+    """
+    def indexes(self, maxSize, start, stop, splits=()):
+        k = -1
+        while k + 1 < len(self.levels) and self.levels[k+1][0] <= maxSize:
+            k += 1
+        if k < 0:
+            return None
+        a, b = self.first + start, self.first + stop
+        splits = numpy.concatenate(([a], numpy.asarray(splits, dtype=numpy.intp) + self.first, [b]))
+        size = self.levels[k][0]
+        buckets = numpy.arange(a // size, (b - 1) // size + 1)
+        indexes = []
+        for size, firstBucket, mins, maxs in self.levels[k::-1]:
+            # Buckets with a split after their first sample
+            inner = numpy.searchsorted(splits, buckets * size, side='right')
+            split = numpy.searchsorted(splits, (buckets + 1) * size - 1, side='right') > inner
+            whole = buckets[~split]
+            indexes += [numpy.maximum(whole * size, self.first), self.decode(mins, whole, firstBucket, size),
+                    self.decode(maxs, whole, firstBucket, size), numpy.minimum((whole + 1) * size, self.total) - 1]
+            buckets = (2 * buckets[split].reshape(-1, 1) + numpy.arange(2)).ravel()
+            # Only the halves which overlap with the samples start:stop are needed
+            buckets = buckets[(buckets * (size // 2) < b) & ((buckets + 1) * (size // 2) > a)]
+        # The remaining buckets are halves of the lowest level, i.e. LOD_BUCKETSIZE // 2 samples
+        samples = (buckets.reshape(-1, 1) * (LOD_BUCKETSIZE // 2) + numpy.arange(LOD_BUCKETSIZE // 2)).ravel()
+        indexes.append(samples[(samples >= a) & (samples < b)])
+        return numpy.sort(numpy.concatenate(indexes)) - self.first
+
+"""
+Spatial index of samples X, Y whose X values are not sorted: The bounding box of the samples is
+divided into GRID_INDEX_SIZE x GRID_INDEX_SIZE buckets and the indexes of the samples are sorted by
+bucket, row by row. Then, the samples of the buckets col0..col1 of a row are a contiguous range of
+self.order, so the samples in a rectangle are found with one slice per row.
+"""
+class GridIndex(object):
+    def __init__(self, X, Y):
+        size = GRID_INDEX_SIZE
+        finite = numpy.isfinite(X) & numpy.isfinite(Y)
+        if finite.any():
+            self.x_min, x_max, self.y_min, y_max = DataSeries.reduceBounds(X[finite], Y[finite])
+        else:
+            self.x_min, x_max, self.y_min, y_max = 0, 0, 0, 0
+        # Buckets of a constant series have some size nevertheless
+        self.xbucket = (x_max - self.x_min) / size or 1
+        self.ybucket = (y_max - self.y_min) / size or 1
+        buckets = self.rows(numpy.where(finite, Y, self.y_min)) * size + self.cols(numpy.where(finite, X, self.x_min))
+        buckets[~finite] = size * size
+        self.order = numpy.argsort(buckets, kind='stable')
+        self.starts = numpy.searchsorted(buckets[self.order], numpy.arange(size * size + 1))
+
+    def cols(self, X):
+        return numpy.clip(numpy.floor((X - self.x_min) / self.xbucket), 0, GRID_INDEX_SIZE - 1).astype(numpy.int32)
+    def rows(self, Y):
+        return numpy.clip(numpy.floor((Y - self.y_min) / self.ybucket), 0, GRID_INDEX_SIZE - 1).astype(numpy.int32)
+
+    """
+    Returns the index of the sample of X, Y (the samples the index has been built for) which is
+    nearest to x, y where a unit of x and y is xscale and yscale long (e.g. in bins of a Mapping),
+    or None if there are no finite samples. The samples in a square around x, y are searched. The
+    square starts with the size of a bucket (or at the bounding box of the samples if x, y lies
+    outside) and is enlarged until it contains a sample.
+    Then, the nearest sample is within the square with the distance to that sample as radius.
+    """
+    def nearest(self, X, Y, x, y, xscale, yscale):
+        size = GRID_INDEX_SIZE
+        if self.starts[-1] == 0:
+            return None
+        dx = max(self.x_min - x, x - (self.x_min + size * self.xbucket), 0) * xscale
+        dy = max(self.y_min - y, y - (self.y_min + size * self.ybucket), 0) * yscale
+        radius = max(math.hypot(dx, dy), min(self.xbucket * xscale, self.ybucket * yscale) / 2)
+        while True:
+            col0, col1 = self.cols(numpy.array([x - radius / xscale, x + radius / xscale]))
+            row0, row1 = self.rows(numpy.array([y - radius / yscale, y + radius / yscale]))
+            candidates = numpy.concatenate([self.order[self.starts[row * size + col0]:self.starts[row * size + col1 + 1]]
+                    for row in range(row0, row1 + 1)])
+            everything = col0 == 0 and col1 == size - 1 and row0 == 0 and row1 == size - 1
+            if len(candidates):
+                distances = numpy.hypot((X[candidates] - x) * xscale, (Y[candidates] - y) * yscale)
+                best = numpy.argmin(distances)
+                if distances[best] <= radius or everything:
+                    return int(candidates[best])
+                radius = distances[best]
+            else:
+                radius *= 4
 
 # TODO Currently unused
 class Lim(object):
@@ -157,6 +920,31 @@ class Mapping(object):
             res = res.astype(int)
         return res
 
+    """
+    Returns a mapping with the same x,y-range which maps to hsub x vsub sub-bins per bin, e.g. to
+    the dots of braille characters. Sub-bin s belongs to bin s // hsub or s // vsub. The center of
+    bin b is at sub-bin b * n + (n-1)/2, so moving by one bin is moving by exactly n sub-bins.
+    """
+    def subdivide(self, hsub, vsub):
+        return Mapping(self.x_from, self.x_to,
+                self.hbin_from * hsub + (hsub-1) / 2, self.hbin_to * hsub + (hsub-1) / 2,
+                self.y_from, self.y_to,
+                self.vbin_from * vsub + (vsub-1) / 2, self.vbin_to * vsub + (vsub-1) / 2)
+
+    """
+    Inverse of map(): Returns the x,y-values at the (fractional) bins hbin, vbin.
+    """
+    def unmap(self, hbin, vbin):
+        return (hbin - self.hbin_from) / self.hbins_per_x + self.x_from, (vbin - self.vbin_from) / self.vbins_per_y + self.y_from
+
+    """
+    Returns a mapping with the same scale for the horizontal bins hbin_from..hbin_to only.
+    """
+    def restrict(self, hbin_from, hbin_to):
+        x_from = self.x_from + (hbin_from - self.hbin_from) / self.hbins_per_x
+        x_to = self.x_from + (hbin_to - self.hbin_from) / self.hbins_per_x
+        return Mapping(x_from, x_to, hbin_from, hbin_to, self.y_from, self.y_to, self.vbin_from, self.vbin_to)
+
     def fits(self, x, y):
         return self.fitsx(x) and self.fitsy(y)
     def fitsx(self, x):
@@ -237,7 +1025,7 @@ class Mapping(object):
         # If it is steep, we use all integers in the y-interval; if it is flat, use the x-interval. This
         # prevents us from having a non-continuous line or even no line at all, imagine a completely vertical
         # line ...
-        DEBUG("mapping_points: {}".format(str(mapping_points)))
+        DEBUG("mapping_points: %s", mapping_points)
         #ah, av = self.map(mapping_points[0][0], mapping_points[0][1], rounding=False)
         #bh, bv = self.map(mapping_points[1][0], mapping_points[1][1], rounding=False)
         ah, av = mapping_points[0][0], mapping_points[0][1]
@@ -245,7 +1033,7 @@ class Mapping(object):
         if bv-av == 0 and bh-ah == 0:
             return []
         is_steep = (bh-ah == 0) or (abs((bv-av)/(bh-ah)) > 1)
-        DEBUG(str(is_steep))
+        DEBUG("%s", is_steep)
         if is_steep: # swap horizontal and vertical for the following calculations (straight line equation)
             ah, av, bh, bv = av, ah, bv, bh
         slope = (bv-av) / (bh-ah)
@@ -257,6 +1045,436 @@ class Mapping(object):
             line.append(point)
         return line
 
+    """
+    Vectorized version of mapLine() for whole data series: Determines the cells of all the
+    connection lines between consecutive points of X and Y at once and returns them as two flat
+    integer arrays cols, rows. The optional outsides argument can be used to pass the result of
+    nofit(X, Y) if it has already been calculated. If a dict counters is given, the number of
+    lines and the number of lines which had to be clipped are added to its 'segments' and 'clipped'.
+    """
+    def mapLines(self, X, Y, outsides=None, counters=None):
+        X = numpy.asarray(X, dtype=float)
+        Y = numpy.asarray(Y, dtype=float)
+        if outsides is None:
+            outsides = self.nofit(X, Y)
+        # Like in plotAll(), a line can be omitted if both of its points lie outside of the
+        # drawing area on the same side. Lines with non-finite points are omitted, too.
+        finite = numpy.isfinite(X) & numpy.isfinite(Y)
+        keep = ((outsides[:-1] & outsides[1:]) == 0) & finite[:-1] & finite[1:]
+        start = numpy.flatnonzero(keep)
+        # Everything else is done in the (unrounded) bin coordinates. As the mapping is affine,
+        # clipping the lines against the borders of the drawing area in x,y-coordinates is the
+        # same as clipping them against the bin-borders after mapping.
+        ah = self.mapx(X[start], rounding=False)
+        av = self.mapy(Y[start], rounding=False)
+        dh = self.mapx(X[start+1], rounding=False) - ah
+        dv = self.mapy(Y[start+1], rounding=False) - av
+        # Liang-Barsky: Each line is a + d * t with t in [0..1]. For each of the four borders,
+        # the line enters the inner half-plane at t = q/p if p < 0 and leaves it if p > 0.
+        # Lines parallel to a border (p == 0) are either completely inside or outside of it.
+        hmin, hmax = sorted((self.hbin_from, self.hbin_to))
+        vmin, vmax = sorted((self.vbin_from, self.vbin_to))
+        t0 = numpy.zeros(len(start))
+        t1 = numpy.ones(len(start))
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            for p, q in ((-dh, ah - hmin), (dh, hmax - ah), (-dv, av - vmin), (dv, vmax - av)):
+                t = q / p
+                t0 = numpy.where(p < 0, numpy.maximum(t0, t), t0)
+                t1 = numpy.where(p > 0, numpy.minimum(t1, t), t1)
+                t1 = numpy.where((p == 0) & (q < 0), -1, t1)
+        visible = t0 <= t1
+        t0, t1 = t0[visible], t1[visible]
+        if counters is not None:
+            counters['segments'] += max(len(X) - 1, 0)
+            counters['clipped'] += int(numpy.count_nonzero((t0 > 0) | (t1 < 1)))
+        ah, av, dh, dv = ah[visible], av[visible], dh[visible], dv[visible]
+        # Map the clipped start and end points to bins
+        h0 = numpy.round(ah + dh * t0)
+        v0 = numpy.round(av + dv * t0)
+        h1 = numpy.round(ah + dh * t1)
+        v1 = numpy.round(av + dv * t1)
+        # Like in mapLine(), we sample each line at every integer along the direction it is
+        # longer in (flat or steep line) so that we get a continuous line. All these samples are
+        # generated at once by repeating each line steps+1 times and counting up within each line.
+        # Lines that start and end in the same bin are not drawn at all.
+        steps = numpy.maximum(numpy.abs(h1 - h0), numpy.abs(v1 - v0)).astype(int)
+        drawn = steps > 0
+        h0, v0, h1, v1, steps = h0[drawn], v0[drawn], h1[drawn], v1[drawn], steps[drawn]
+        counts = steps + 1
+        offsets = numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        t = offsets / numpy.repeat(steps, counts)
+        cols = numpy.round(numpy.repeat(h0, counts) + numpy.repeat(h1 - h0, counts) * t).astype(int)
+        rows = numpy.round(numpy.repeat(v0, counts) + numpy.repeat(v1 - v0, counts) * t).astype(int)
+        return cols, rows
+
+    """
+    Returns the columns of the points X for decimate(). All points left or right of the drawing
+    area are collected in one column each so that we do not produce runs for columns which are
+    not visible anyway. This has to be decided before rounding as the points of a run must be
+    either all visible or not.
+    """
+    def columns(self, X):
+        hmin, hmax = sorted((self.hbin_from, self.hbin_to))
+        cols = numpy.nan_to_num(self.mapx(X, rounding=False), nan=hmin - 1)
+        return numpy.where(cols < hmin, hmin - 1, numpy.where(cols > hmax, hmax + 1, numpy.round(cols)))
+
+    """
+    For increasing X values, returns the (increasing) indexes i in start+1..stop-1 at which a new
+    column starts, i.e. columns(X[i]) differs from columns(X[i-1]). As the columns of increasing X
+    values are monotonic, the first point of each column is found by a binary search, so only
+    about width * log2(stop - start) points are mapped.
+    """
+    def columnStarts(self, X, start, stop):
+        hmin, hmax = sorted((self.hbin_from, self.hbin_to))
+        values = numpy.concatenate(([hmin - 1], numpy.arange(numpy.round(hmin), numpy.round(hmax) + 1), [hmax + 1]))
+        # The columns are made increasing for decreasing mappings
+        sign = 1 if self.hbins_per_x > 0 else -1
+        values = numpy.sort(sign * values)[1:]
+        lo = numpy.full(len(values), start)
+        hi = numpy.full(len(values), stop)
+        while (lo < hi).any():
+            mid = (lo + hi) // 2
+            reached = sign * self.columns(X[numpy.minimum(mid, stop - 1)]) >= values
+            reached |= mid >= stop
+            hi = numpy.where(reached, mid, hi)
+            lo = numpy.where(reached, lo, mid + 1)
+        return numpy.unique(lo[(lo > start) & (lo < stop)])
+
+    """
+    Returns the (starts, lengths, ends) of the runs of consecutive points X which are mapped on
+    the same column for decimate().
+    """
+    def columnRuns(self, X):
+        cols = self.columns(X)
+        return self.runs(numpy.flatnonzero(numpy.concatenate(([True], cols[1:] != cols[:-1]))), len(X))
+
+    """
+    Returns the (starts, lengths, ends) of the runs of n points which start at the (increasing)
+    indexes starts, the first of which is 0.
+    """
+    @staticmethod
+    def runs(starts, n):
+        lengths = numpy.diff(numpy.append(starts, n))
+        return starts, lengths, starts + lengths - 1
+
+    """
+    Returns the (cols, rows) of the bins which contain at least one of the points X, Y in the
+    drawing area, each bin once. With many points per bin, this is much less than the points.
+    """
+    def cells(self, X, Y):
+        left, right = sorted((self.x_from, self.x_to))
+        bottom, top = sorted((self.y_from, self.y_to))
+        hmin, hmax = numpy.round(sorted((self.hbin_from, self.hbin_to))).astype(int)
+        vmin, vmax = numpy.round(sorted((self.vbin_from, self.vbin_to))).astype(int)
+        width = hmax - hmin + 1
+        occupied = numpy.zeros((vmax - vmin + 1) * width, dtype=bool)
+        # The points are processed in chunks of CHUNKSIZE so that the temporary arrays stay small
+        for start in range(0, len(X), CHUNKSIZE):
+            x, y = X[start:start+CHUNKSIZE], Y[start:start+CHUNKSIZE]
+            # Like nofit() == 0 but cheaper for many points. NaNs are outside, too.
+            inside = (x >= left) & (x <= right) & (y >= bottom) & (y <= top)
+            # Like mapx() and mapy() (in the same floating point type) but in place
+            x = numpy.array(x[inside], dtype=numpy.result_type(x, self.x_from, self.hbins_per_x, self.hbin_from))
+            y = numpy.array(y[inside], dtype=numpy.result_type(y, self.y_from, self.vbins_per_y, self.vbin_from))
+            for values, origin, scale, offset, first in ((x, self.x_from, self.hbins_per_x, self.hbin_from, hmin),
+                    (y, self.y_from, self.vbins_per_y, self.vbin_from, vmin)):
+                values -= origin
+                values *= scale
+                values += offset
+                numpy.rint(values, out=values)
+                values -= first
+            y *= width
+            y += x
+            occupied[y.astype(numpy.intp)] = True
+        rows, cols = numpy.divmod(numpy.flatnonzero(occupied), width)
+        return cols + hmin, rows + vmin
+
+    """
+    M4-decimation: Returns the (increasing) indexes of the points of X and Y which are necessary
+    to draw the same picture as with all the points. For each run of consecutive points which are
+    mapped on the same column, only the first, the last, the minimum and the maximum point are kept.
+    The connection lines between the kept points of a run cover the same rows in that column as the
+    connection lines between all the points of the run did. The runs can be given if they are
+    known from columnRuns() already.
+    """
+    def decimate(self, X, Y, runs=None):
+        n = len(X)
+        if n == 0:
+            return numpy.arange(0)
+        starts, lengths, ends = self.columnRuns(X) if runs is None else runs
+        indexes = [starts, ends]
+        # The minimum and maximum of each run are found by comparing each point with the
+        # extremum of its run and taking the first matching index at or after the run start.
+        # If there is no match inside the run (e.g. because of NaNs), the run start is used.
+        for reduce in (numpy.fmin, numpy.fmax):
+            extrema = numpy.repeat(reduce.reduceat(Y, starts), lengths)
+            matches = numpy.append(numpy.flatnonzero(Y == extrema), n)
+            found = matches[numpy.searchsorted(matches, starts)]
+            indexes.append(numpy.where(found <= ends, found, starts))
+        return numpy.unique(numpy.concatenate(indexes))
+
+
+"""
+Offscreen drawing target: A frame is drawn into numpy arrays of glyphs, color pair numbers and
+reverse-flags first. Afterwards, only the differences to the previously shown frame have to be
+written to the terminal (see changes()).
+"""
+class FrameBuffer(object):
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.glyphs = numpy.full((height, width), ' ', dtype='<U1')
+        self.colors = numpy.zeros((height, width), dtype=numpy.int16)
+        self.reverse = numpy.zeros((height, width), dtype=bool)
+
+    def clear(self):
+        self.glyphs[:] = ' '
+        self.colors[:] = 0
+        self.reverse[:] = False
+
+    """
+    Like curses' window.addstr() but with a color pair number instead of an attribute. Text which
+    does not fit into the frame is cut off.
+    """
+    def addstr(self, row, col, text, color=0, reverse=False):
+        if row < 0 or row >= self.height or col >= self.width:
+            return
+        if col < 0:
+            text, col = text[-col:], 0
+        text = text[:self.width - col]
+        self.glyphs[row, col:col+len(text)] = list(text)
+        self.colors[row, col:col+len(text)] = color
+        self.reverse[row, col:col+len(text)] = reverse
+
+    """
+    Vectorized drawing of a single character at each cell (cols[i], rows[i]).
+    """
+    def addcells(self, rows, cols, char, color=0, reverse=False):
+        self.glyphs[rows, cols] = char
+        self.colors[rows, cols] = color
+        self.reverse[rows, cols] = reverse
+
+    """
+    Compares this frame to the previous frame and returns all changed cells as a list of
+    (row, col, text, color, reverse)-tuples. Consecutive changed cells of the same row which share
+    their color and reverse-flag are merged into a single text. If there is no previous frame (or
+    its size differs), every cell has changed.
+    """
+    def changes(self, previous=None):
+        if previous is None or previous.glyphs.shape != self.glyphs.shape:
+            changed = numpy.ones(self.glyphs.shape, dtype=bool)
+        else:
+            changed = (self.glyphs != previous.glyphs) | (self.colors != previous.colors) \
+                    | (self.reverse != previous.reverse)
+        changed = changed.ravel()
+        style = (self.colors.astype(int) * 2 + self.reverse).ravel()
+        # A run starts at each changed cell which starts a row, follows an unchanged cell or
+        # differs in style from its predecessor. It ends before the next start or unchanged cell.
+        newrow = numpy.arange(changed.size) % self.width == 0
+        follows = numpy.concatenate(([False], changed[:-1] & (style[1:] == style[:-1])))
+        starts = numpy.flatnonzero(changed & (newrow | ~follows))
+        unchanged = numpy.flatnonzero(~changed)
+        nextstart = numpy.append(starts[1:], changed.size)
+        nextunchanged = numpy.append(unchanged, changed.size)[numpy.searchsorted(unchanged, starts)]
+        ends = numpy.minimum(nextstart, nextunchanged)
+        glyphs = self.glyphs.ravel()
+        result = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            row, col = divmod(start, self.width)
+            text = "".join(glyphs[start:end])
+            result.append((row, col, text, int(self.colors.flat[start]), bool(self.reverse.flat[start])))
+        return result
+
+    """
+    Draws all non-empty cells of the frame other on top of this frame.
+    """
+    def overlay(self, other):
+        mask = other.glyphs != ' '
+        self.glyphs[mask] = other.glyphs[mask]
+        self.colors[mask] = other.colors[mask]
+        self.reverse[mask] = other.reverse[mask]
+
+    def copy(self):
+        frame = FrameBuffer(self.height, self.width)
+        frame.glyphs[:] = self.glyphs
+        frame.colors[:] = self.colors
+        frame.reverse[:] = self.reverse
+        return frame
+
+
+"""
+A Renderer is the output device of a Grapher: It reports the size of the screen and shows the
+changed cells of a frame (see FrameBuffer.changes()). Colors are given as color pair numbers where
+pair i+1 is the terminal color i on the default background.
+"""
+class Renderer(object):
+    def getmaxyx(self):
+        raise NotImplementedError
+
+    """
+    Forgets the current screen contents so that the next frame is written completely.
+    """
+    def erase(self):
+        raise NotImplementedError
+
+    def write(self, row, col, text, color=0, reverse=False):
+        raise NotImplementedError
+
+    """
+    Called after a frame has been written. Several renderers can be refreshed at once afterwards
+    (see Dashboard).
+    """
+    def refresh(self):
+        pass
+
+"""
+Renderer for a curses window.
+"""
+class CursesRenderer(Renderer):
+    def __init__(self, window):
+        self.window = window
+        # Initalise color
+        curses.start_color()
+        curses.use_default_colors()
+        for i in range(curses.COLORS):
+            curses.init_pair(i+1, i, -1)
+
+    def getmaxyx(self):
+        return self.window.getmaxyx()
+
+    def erase(self):
+        self.window.erase()
+
+    def write(self, row, col, text, color=0, reverse=False):
+        attr = curses.color_pair(color) | (curses.A_REVERSE if reverse else 0)
+        try:
+            self.window.addstr(row, col, text, attr)
+        except curses.error:
+            # Writing the lower right cell of a window moves the cursor out of the window
+            # which is reported as an error although the text has been written.
+            pass
+
+    """
+    Only marks the window for the next curses.doupdate() which is called by the drawing loops once
+    per frame, after all keys have been handled and all windows have been redrawn.
+    """
+    def refresh(self):
+        self.window.noutrefresh()
+
+"""
+Renderer without a terminal: The frames are kept in a FrameBuffer of the given size which can be
+returned as plain text, as text with ANSI color codes or as an array of glyphs.
+"""
+class HeadlessRenderer(Renderer):
+    def __init__(self, height, width):
+        self.screen = FrameBuffer(height, width)
+
+    def getmaxyx(self):
+        return self.screen.height, self.screen.width
+
+    def erase(self):
+        self.screen.clear()
+
+    def write(self, row, col, text, color=0, reverse=False):
+        self.screen.addstr(row, col, text, color, reverse)
+
+    def text(self):
+        return "\n".join("".join(row) for row in self.screen.glyphs)
+
+    """
+    Returns the screen as text with ANSI escape sequences for the colors and reverse cells.
+    """
+    def ansi(self):
+        lines = []
+        for glyphs, colors, reverse in zip(self.screen.glyphs, self.screen.colors, self.screen.reverse):
+            line = ""
+            style = (0, False)
+            for glyph, color, rev in zip(glyphs, colors.tolist(), reverse.tolist()):
+                if (color, rev) != style:
+                    codes = ["0"] + (["3%i" % (color - 1)] if color > 0 else []) + (["7"] if rev else [])
+                    line += "\x1b[%sm" % ";".join(codes)
+                    style = (color, rev)
+                line += glyph
+            if style != (0, False):
+                line += "\x1b[0m"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def glyphs(self):
+        return self.screen.glyphs.copy()
+
+"""
+Measures the stages of Grapher.redraw(): While a Profiler is attached to a Grapher, the methods
+named in STAGES are replaced by timed wrappers on the Grapher instance. Detaching removes the
+wrappers again, so a Grapher without Profiler runs exactly the same code as before.
+Per frame, the durations of the stages (in seconds, nested stages are contained in the stage which
+calls them) and the counters are collected in a dict which is passed to all hooks and kept as
+self.lastProfile.
+Counters:
+* 'cells':    cells plotted for the data series
+* 'segments': connection lines handed to Mapping.mapLines()
+* 'clipped':  connection lines which had to be clipped at the border of the drawing area
+* 'written':  cells written to the renderer by Grapher.flush()
+"""
+class Profiler(object):
+    STAGES = ['getPlotArea', 'clearPlotArea', 'updateAxis', 'updateMapping', 'updateSeriesLayer',
+            'decimateAll', 'plotAll', 'compositeSeries', 'plotGridlines', 'plotAxis', 'plotGrid', 'updateLegend', 'flush']
+
+    def __init__(self):
+        self.hooks = []
+        self.frames = 0
+        self.lastProfile = None
+        self.startFrame()
+
+    def startFrame(self):
+        self.stages = {}
+        self.counters = {'cells': 0, 'segments': 0, 'clipped': 0, 'written': 0}
+
+    def endFrame(self, total):
+        self.frames += 1
+        profile = {'frame': self.frames, 'total': total, 'stages': self.stages}
+        profile.update(self.counters)
+        self.lastProfile = profile
+        DEBUG("profile %s", profile)
+        for hook in self.hooks:
+            hook(profile)
+        self.startFrame()
+
+    def count(self, counter, n):
+        self.counters[counter] += n
+
+    def add(self, counters):
+        for counter, n in counters.items():
+            self.counters[counter] += n
+
+    def attach(self, grapher):
+        for name in self.STAGES:
+            setattr(grapher, name, self.timed(name, getattr(grapher, name)))
+        redraw = grapher.redraw
+        def timedRedraw():
+            start = time.perf_counter()
+            redraw()
+            self.endFrame(time.perf_counter() - start)
+        grapher.redraw = timedRedraw
+
+    def detach(self, grapher):
+        for name in self.STAGES + ['redraw']:
+            grapher.__dict__.pop(name, None)
+
+    def timed(self, name, method):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.stages[name] = self.stages.get(name, 0) + time.perf_counter() - start
+        return wrapper
+
+"""
+Raised by Grapher.checkInterrupt() to abort a redraw.
+"""
+class RedrawInterrupted(Exception):
+    pass
 
 class Grapher(object):
     seriesList = []
@@ -264,27 +1482,60 @@ class Grapher(object):
     colorList = [2, 3, 4, 5, 6, 7]
     autoAxis = True
     draw_lines = True
+    braille = False
+    showProfile = False
+    showStatistics = False
+    # Profiler which measures the redraws, see setProfiler()
+    profiler = None
+    # See requestRedraw() and checkInterrupt()
+    deferRedraws = False
+    redrawRequested = False
+    inputPending = None
+    # Cell (row, col) of the crosshair cursor or None, see toggleCursor()
+    cursor = None
+    # Direction of the last move, which is prefetched first (see prefetch())
+    lastMove = 'moveright'
+    # Graphers (including this one) which share the automatic x range, see Dashboard
+    linked = ()
+    # Dict of column starts which are shared with other Graphers, see columnStarts()
+    sharedRuns = None
+    # Highlights the corner of the axes, e.g. for the focused panel of a Dashboard
+    marked = False
+    # Axis limits until there is any data
+    x_min, x_max, y_min, y_max = -1, 1, -1, 1
 
+    """
+    Draws to the given Renderer or to a curses window which is wrapped by a CursesRenderer.
+    """
     def __init__(self, window):
         # Reset seriesList for consecutive calls
         self.seriesList = []
+        # Nothing has been written to the window yet
+        self.lastFrame = None
+        self.bytes_written = 0
+        # Nothing has been plotted yet
+        self.seriesLayerKey = None
+        self.seriesCells = {}
+        self.seriesCellsKey = None
+        self.pendingScroll = None
+        # Cells of other views (see storeView()) and the views which are prefetched
+        self.frameCache = {}
+        self.prefetching = {}
+        self.prefetchGeneration = 0
         # Initialize borders
         self.border_left = LEFTBORDER
         self.border_bottom = BOTTOMBORDER
         # Setup the window
         self.setWindow(window)
-        # Initalise color
-        curses.start_color()
-        curses.use_default_colors()
-        for i in range(curses.COLORS):
-            curses.init_pair(i+1, i, -1)
 
     def setWindow(self, window):
-        self.window = window # TODO: Setup borders with window
+        if not isinstance(window, Renderer):
+            window = CursesRenderer(window)
+        self.renderer = window # TODO: Setup borders with window
         self.getPlotArea()
 
     def getPlotArea(self):
-        self.height, self.width = self.window.getmaxyx()
+        self.height, self.width = self.renderer.getmaxyx()
         self.left = self.border_left
         self.right = self.width-1
         self.top = 0
@@ -298,8 +1549,9 @@ class Grapher(object):
         self.y_max = y_max
 
     """
-    If self.autoAxis is True, scans all the data series in self.seriesList
-    and determines x_min, x_max, y_min, y_max.
+    If self.autoAxis is True, determines x_min, x_max, y_min, y_max from the bounds of all the
+    data series in self.seriesList. The bounds are cached by the series, so this does not scan
+    the data again unless it has changed.
     """
     def updateAxis(self):
         if self.autoAxis:
@@ -308,19 +1560,40 @@ class Grapher(object):
             seriesYMins = []
             seriesYMaxs = []
             for ds in self.seriesList:
-                seriesXMins.append(min(ds.X))
-                seriesXMaxs.append(max(ds.X))
-                DEBUG("Series XMax %f" % max(ds.X))
-                seriesYMins.append(min(ds.Y))
-                seriesYMaxs.append(max(ds.Y))
+                bounds = ds.bounds()
+                if bounds is None or not numpy.isfinite(bounds).all():
+                    continue
+                xmin, xmax, ymin, ymax = bounds
+                seriesXMins.append(xmin)
+                seriesXMaxs.append(xmax)
+                DEBUG("Series XMax %f", xmax)
+                seriesYMins.append(ymin)
+                seriesYMaxs.append(ymax)
+            if not seriesXMins:
+                return
+            # Linked Graphers show the x range of all their series
+            for other in self.linked:
+                if other is self:
+                    continue
+                for ds in other.seriesList:
+                    bounds = ds.bounds()
+                    if bounds is not None and numpy.isfinite(bounds[:2]).all():
+                        seriesXMins.append(bounds[0])
+                        seriesXMaxs.append(bounds[1])
             self.x_min = min(seriesXMins)
             self.x_max = max(seriesXMaxs)
             self.y_min = min(seriesYMins) - 0.1 * (max(seriesYMaxs) - min(seriesYMins))
             self.y_max = max(seriesYMaxs) + 0.1 * (max(seriesYMaxs) - min(seriesYMins))
+            # A series might be constant or consist of a single sample only (e.g. at the start of
+            # a stream). The mapping needs something to map to, so we take the neighbourhood.
+            if self.x_min == self.x_max:
+                self.x_min, self.x_max = self.x_min - 1, self.x_max + 1
+            if self.y_min == self.y_max:
+                self.y_min, self.y_max = self.y_min - 1, self.y_max + 1
 
     def autosize(self):
         self.autoAxis = True
-        self.redraw()
+        self.requestRedraw()
 
     """
     The next x methods: quick and dirty resize and move.
@@ -333,7 +1606,7 @@ class Grapher(object):
         self.autoAxis = False
         self.x_max = center + size / 2
         self.x_min = center - size / 2
-        self.redraw()
+        self.requestRedraw()
 
     def getysize(self):
         center = (self.y_max + self.y_min) / 2
@@ -343,7 +1616,7 @@ class Grapher(object):
         self.autoAxis = False
         self.y_max = center + size / 2
         self.y_min = center - size / 2
-        self.redraw()
+        self.requestRedraw()
 
     def changex(self, relmove, relzoom):
         center, size = self.getxsize()
@@ -355,9 +1628,11 @@ class Grapher(object):
     def zoomoutx(self):
         self.changex(0, 4/3)
     def moveright(self):
-        self.changex(.2, 1)
+        self.lastMove = 'moveright'
+        self.scrollx(.2)
     def moveleft(self):
-        self.changex(-.2, 1)
+        self.lastMove = 'moveleft'
+        self.scrollx(-.2)
 
     def changey(self, relmove, relzoom):
         center, size = self.getysize()
@@ -369,9 +1644,53 @@ class Grapher(object):
     def zoomouty(self):
         self.changey(0, 4/3)
     def moveup(self):
-        self.changey(.2, 1)
+        self.lastMove = 'moveup'
+        self.scrolly(.2)
     def movedown(self):
-        self.changey(-.2, 1)
+        self.lastMove = 'movedown'
+        self.scrolly(-.2)
+
+    """
+    Moves the drawing area by relmove (relative to its size) like changex() and changey() but
+    snaps the movement to whole columns or rows. Then, the plotted data series do not have to be
+    redrawn completely but can be shifted so that only the uncovered strip has to be drawn.
+    Scrolls which are made before the next redraw (see requestRedraw()) are added up.
+    This is only done for horizontal moves: The samples of a horizontal strip are found without
+    looking at the others, but all visible samples would have to be decimated for a vertical one,
+    which is most of the work of a complete redraw. So vertical moves are just snapped to rows.
+    """
+    def scrollx(self, relmove):
+        cols = int(round(relmove * (self.right - self.left)))
+        if cols == 0 or not self.layerValid():
+            return self.changex(relmove, 1)
+        self.autoAxis = False
+        self.x_min += cols / self.mapping.hbins_per_x
+        self.x_max += cols / self.mapping.hbins_per_x
+        self.addScroll(0, -cols)
+    def scrolly(self, relmove):
+        rows = int(round(relmove * (self.bottom - self.top)))
+        if rows == 0 or not self.layerValid():
+            return self.changey(relmove, 1)
+        self.autoAxis = False
+        self.y_min += rows / -self.mapping.vbins_per_y
+        self.y_max += rows / -self.mapping.vbins_per_y
+        self.requestRedraw()
+
+    """
+    Checks if the series layer can still be used, i.e. if nothing but the scrolls which are
+    pending for the next redraw has changed since it has been plotted.
+    """
+    def layerValid(self):
+        expected = self.seriesLayerKey if self.pendingScroll is None else self.pendingScroll[2]
+        return expected == self.layerKey()
+
+    def addScroll(self, rows, cols):
+        # The mapping of the layer is kept, see updateSeriesLayer()
+        mapping = self.mapping
+        if self.pendingScroll is not None:
+            rows, cols, mapping = rows + self.pendingScroll[0], cols + self.pendingScroll[1], self.pendingScroll[3]
+        self.pendingScroll = (rows, cols, self.layerKey(), mapping)
+        self.requestRedraw()
 
     """
     The next methods: Determine nice grid points
@@ -385,7 +1704,7 @@ class Grapher(object):
         upper = 10 ** math.ceil(maxMagnitude)
         upperMagnitude = upper
         candidates = [.5 * upper, .25 * upper, .2 * upper, .1 * upper]
-        DEBUG("size = {}, maxdist = {}, upper = {}".format(size, maxDistance, upper))
+        DEBUG("size = %s, maxdist = %s, upper = %s", size, maxDistance, upper)
         distance = None
         for candidate in candidates:
             if candidate < maxDistance:
@@ -417,39 +1736,37 @@ class Grapher(object):
         for x in xgrid:
             col = self.mapx(x)
             for row in range(self.top, self.bottom):
-                self.window.addstr(row, col, '|') # TODO Replace by unicode box-drawing character
+                self.frame.addstr(row, col, '|') # TODO Replace by unicode box-drawing character
         for y in ygrid:
             row = self.mapy(y)
             for col in range(self.left, self.right):
-                self.window.addstr(row, col, '-') # TODO see above
+                self.frame.addstr(row, col, '-') # TODO see above
     
     def plotGrid(self):
         if not self.border_bottom or not self.border_left:
             return
         xgrid = self.getxgrid()
         ygrid = self.getygrid()
-        for col in range(self.left, self.right+1):
-            self.window.addstr(self.bottom+1, col, '─')
-        for row in range(self.top, self.bottom+1):
-            self.window.addstr(row, self.left-1, '│')
-        self.window.addstr(self.bottom+1, self.left-1, '└')
+        self.frame.addstr(self.bottom+1, self.left, '─' * (self.right+1 - self.left))
+        self.frame.addcells(slice(self.top, self.bottom+1), self.left-1, '│')
+        self.frame.addstr(self.bottom+1, self.left-1, '└', reverse=self.marked)
         for x in xgrid:
             col = self.mapping.mapx(x)
             text = str(x)
-            self.window.addstr(self.bottom+1, col, '┴') # self.bottom+1 == self.height-2 (line before last line)
+            self.frame.addstr(self.bottom+1, col, '┴') # self.bottom+1 == self.height-2 (line before last line)
             if col + len(text) > self.width-1:
                 col = self.width-1 - len(text)
-            self.window.addstr(self.bottom+2, col, text) # self.bottom+2 == self.height-1 (last line)
+            self.frame.addstr(self.bottom+2, col, text) # self.bottom+2 == self.height-1 (last line)
         for y in ygrid:
             row = self.mapping.mapy(y)
-            self.window.addstr(row, self.border_left-1, '├')
+            self.frame.addstr(row, self.border_left-1, '├')
             text = str(y)
             # The left-border text length should be <= border_left-1 --> len <= border_left-2 + " "
             if len(text) > self.border_left-2:
                 text = text[0:self.border_left-2] + " "
             else:
                 text = " " * (self.border_left-2-len(text)) + text + " "
-            self.window.addstr(row, 0, text)
+            self.frame.addstr(row, 0, text)
 
     """
     Plots the coordinate system axis, the ordinate and abscissa.
@@ -460,21 +1777,19 @@ class Grapher(object):
         centercol, centerrow = self.mapping.map(0, 0)
         # Plot y axis
         if self.mapping.fitsx(0):
-            for row in range(self.top, self.bottom+1):
-                self.window.addstr(row, centercol, "│")
-            self.window.addstr(self.top, centercol, "↑") # arrow
+            self.frame.addcells(slice(self.top, self.bottom+1), centercol, "│")
+            self.frame.addstr(self.top, centercol, "↑") # arrow
         # Plot x axis
         if self.mapping.fitsy(0):
-            for col in range(self.left, self.right+1):
-                self.window.addstr(centerrow, col, "─")
-            self.window.addstr(centerrow, self.right, "→") # arrow
+            self.frame.addstr(centerrow, self.left, "─" * (self.right+1 - self.left))
+            self.frame.addstr(centerrow, self.right, "→") # arrow
         # Plot origin
         if self.mapping.fits(0, 0):
-            self.window.addstr(centerrow, centercol, "┼")
+            self.frame.addstr(centerrow, centercol, "┼")
 
     def toggleLegend(self):
         self.legend = not self.legend
-        self.redraw() # this calls updateLegend(), too
+        self.requestRedraw() # this calls updateLegend(), too
 
     def toggleTicks(self):
         if self.border_left and self.border_bottom:
@@ -483,11 +1798,123 @@ class Grapher(object):
         else:
             self.border_left = LEFTBORDER
             self.border_bottom = BOTTOMBORDER
-        self.redraw()
+        self.requestRedraw()
 
     def toggleLines(self):
         self.draw_lines = not self.draw_lines
-        self.redraw()
+        self.requestRedraw()
+
+    def toggleBraille(self):
+        self.braille = not self.braille
+        self.requestRedraw()
+
+    """
+    Shows or hides the statistics of the visible samples of each series (see plotStatistics()).
+    """
+    def toggleStatistics(self):
+        self.showStatistics = not self.showStatistics
+        self.requestRedraw()
+
+    """
+    Shows or hides a crosshair cursor in the center of the drawing area. The nearest samples to the
+    cursor are shown next to it (see plotCursor()).
+    """
+    def toggleCursor(self):
+        if self.cursor is None:
+            self.cursor = ((self.top + self.bottom) // 2, (self.left + self.right) // 2)
+        else:
+            self.cursor = None
+        self.requestRedraw()
+
+    """
+    Moves the cursor by rows and cols cells. As long as the view does not change, only the
+    overlays are drawn again, the series layer is kept.
+    """
+    def moveCursor(self, rows, cols):
+        if self.cursor is None:
+            return
+        self.cursor = (self.cursor[0] + rows, self.cursor[1] + cols)
+        self.requestRedraw()
+
+    """
+    If the cursor is shown, plots the crosshair behind the series and the x,y-values at the
+    cursor as well as the nearest sample of each series (see DataSeries.nearest()) in the lower
+    left corner. The nearest samples are highlighted if they are visible.
+    """
+    def plotCursor(self):
+        if self.cursor is None:
+            return
+        row = min(max(self.cursor[0], self.top), self.bottom)
+        col = min(max(self.cursor[1], self.left), self.right)
+        self.cursor = (row, col)
+        empty = self.frame.glyphs[row, self.left:self.right+1] == ' '
+        self.frame.glyphs[row, self.left:self.right+1][empty] = '─'
+        empty = self.frame.glyphs[self.top:self.bottom+1, col] == ' '
+        self.frame.glyphs[self.top:self.bottom+1, col][empty] = '│'
+        self.frame.addstr(row, col, '┼', reverse=True)
+        x, y = self.mapping.unmap(col, row)
+        lines = [("cursor", "x=%.6g y=%.6g" % (x, y), 0)]
+        for ds in self.seriesList:
+            sample = ds.nearest(x, y, self.mapping)
+            if sample is None:
+                continue
+            lines.append((ds.label, "x=%.6g y=%.6g" % sample, ds.color))
+            if self.mapping.fits(*sample):
+                samplecol, samplerow = self.mapping.map(*sample)
+                self.frame.addstr(samplerow, samplecol, self.frame.glyphs[samplerow, samplecol], ds.color, reverse=True)
+        labelwidth = max(len(label) for label, _, _ in lines)
+        lines = [(label.ljust(labelwidth) + " " + text, color) for label, text, color in lines]
+        width = max(len(text) for text, _ in lines)
+        for i, (text, color) in enumerate(lines):
+            self.frame.addstr(self.bottom - len(lines) + 1 + i, self.left + 1, text.ljust(width), color, reverse=True)
+
+    """
+    Attaches the given Profiler to this Grapher (or detaches the current one with None).
+    """
+    def setProfiler(self, profiler):
+        if self.profiler is not None:
+            self.profiler.detach(self)
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.attach(self)
+
+    """
+    Adds a function which is called with the profile (see Profiler) after each redraw.
+    """
+    def addProfileHook(self, hook):
+        if self.profiler is None:
+            self.setProfiler(Profiler())
+        self.profiler.hooks.append(hook)
+
+    """
+    Shows or hides the profile of the last redraw in the upper left corner. The Profiler is only
+    attached as long as it is needed.
+    """
+    def toggleProfile(self):
+        self.showProfile = not self.showProfile
+        if self.showProfile and self.profiler is None:
+            self.setProfiler(Profiler())
+        elif not self.showProfile and not self.profiler.hooks:
+            self.setProfiler(None)
+        self.requestRedraw()
+
+    """
+    If self.showProfile is True, plots the profile of the last redraw in the upper left corner.
+    """
+    def plotProfile(self):
+        if not self.showProfile:
+            return
+        profile = self.profiler.lastProfile
+        if profile is None:
+            lines = ["profiling ..."]
+        else:
+            lines = ["frame %i: %.1f ms" % (profile['frame'], 1000 * profile['total'])]
+            lines += ["%-17s %6.1f ms" % (name, 1000 * duration) for name, duration in profile['stages'].items()]
+            lines += ["%-8s %7i cells" % (counter, profile[counter]) for counter in ('cells', 'written')]
+            lines += ["%-8s %7i lines" % (counter, profile[counter]) for counter in ('segments', 'clipped')]
+        width = max(len(line) for line in lines)
+        for row, line in enumerate(lines):
+            self.frame.addstr(self.top + row, self.left + 1, line.ljust(width), reverse=True)
 
     """
     If self.legend is True, plots a legend box in the upper right corner.
@@ -501,12 +1928,116 @@ class Grapher(object):
             labelLengths.append(len(ds.label))
         x = self.right+1 - max(labelLengths)
         for ds in self.seriesList:
-            self.window.addstr(y, x, " "*max(labelLengths), curses.color_pair(ds.color) | curses.A_REVERSE)
-            self.window.addstr(y, x, ds.label, curses.color_pair(ds.color) | curses.A_REVERSE)
+            self.frame.addstr(y, x, " "*max(labelLengths), ds.color, reverse=True)
+            self.frame.addstr(y, x, ds.label, ds.color, reverse=True)
             y += 1
 
+    """
+    If self.showStatistics is True, plots the number, minimum, maximum, mean and root mean square
+    of the visible samples of each series (see DataSeries.statistics()) in the upper right corner,
+    left of the legend.
+    """
+    def plotStatistics(self):
+        if not self.showStatistics or not self.seriesList:
+            return
+        lines = []
+        for ds in self.seriesList:
+            stats = ds.statistics(self.x_min, self.x_max)
+            if stats is None:
+                text = "no samples"
+            else:
+                text = "n=%i min=%.4g max=%.4g mean=%.4g rms=%.4g" % stats
+            if not self.legend:
+                text = ds.label + ": " + text
+            lines.append(text)
+        width = max(len(text) for text in lines)
+        x = self.right+1 - width
+        if self.legend:
+            x -= max(len(ds.label) for ds in self.seriesList) + 1
+        for y, (ds, text) in enumerate(zip(self.seriesList, lines)):
+            self.frame.addstr(y, x, text.rjust(width), ds.color, reverse=True)
+
     def updateMapping(self):
         self.mapping = Mapping(self.x_min, self.x_max, self.left, self.right, self.y_min, self.y_max, self.bottom, self.top)
+        # The data series are rasterized with the braille dots as bins in braille mode
+        self.rasterMapping = self.mapping.subdivide(2, 4) if self.braille else self.mapping
+
+    """
+    Determines the data which is actually plotted for each DataSeries with the current mapping
+    and stores it as (series, X, Y, marks)-tuples in self.plotData (see decimate()). If a mapping
+    cull is given, only the data which is visible with cull is considered. If seriesList is given,
+    only these series are considered.
+    """
+    def decimateAll(self, cull=None, seriesList=None):
+        if seriesList is None:
+            seriesList = self.seriesList
+        self.plotData = []
+        for data in self.mapSeries(lambda ds: self.decimate(ds, cull), seriesList):
+            self.checkInterrupt()
+            self.plotData.append(data)
+
+    """
+    Returns the DataSeries ds, the X and Y values of its lines and the cells (cols, rows) of its
+    points (marks) or None if the points are drawn at X, Y. The lines are drawn through the samples
+    which are kept by Mapping.decimate(), but these only contain a few of the points of each column.
+    So if there are at most EXACT_MARKS_PER_COLUMN visible samples per column, the points are drawn
+    at the cells of all of them (see Mapping.cells()) unless they are covered by the lines anyway
+    (in braille mode). With more samples, this would take a pass over all of them, so the points
+    are only drawn at the decimated samples then.
+    """
+    def decimate(self, ds, cull=None):
+        if ds.style == 'density':
+            # All visible samples are counted
+            return (ds,) + ds.visibleData(self.mapping, cull) + (None,)
+        X, Y, runs = ds.viewData(self.rasterMapping, cull, self.columnStarts(ds))
+        indexes = self.rasterMapping.decimate(X, Y, runs)
+        marks = None
+        self.checkInterrupt()
+        if self.exactMarks(ds, self.mapping):
+            marks = self.rasterMapping.cells(*ds.visibleData(self.rasterMapping, cull))
+        return ds, X[indexes], Y[indexes], marks
+
+    """
+    Checks if the points of the DataSeries ds are drawn at the cells of all of its samples with the
+    given mapping (see decimate()). This is decided for the complete view, also if only a part of
+    it is plotted.
+    """
+    def exactMarks(self, ds, mapping):
+        if ds.style == 'density' or (self.braille and self.draw_lines):
+            return False
+        rasterMapping = mapping.subdivide(2, 4) if self.braille else mapping
+        visible = len(ds.visibleData(rasterMapping)[0])
+        return visible <= EXACT_MARKS_PER_COLUMN * (abs(mapping.hbin_to - mapping.hbin_from) + 1)
+
+    """
+    Returns a function columnStarts(start, stop) for DataSeries.viewData() which shares the starts
+    of the columns (see Mapping.columnStarts()) in self.sharedRuns, or None if they are not shared.
+    They only depend on the stored X values of the series, so series with the same X array (e.g.
+    in the panels of a Dashboard, see Figure.storeX()) look them up once per frame, whichever
+    samples they select from them (e.g. by their Pyramid).
+    """
+    def columnStarts(self, ds):
+        if self.sharedRuns is None:
+            return None
+        owner = ds.X if ds.X.base is None else ds.X.base
+        m = self.rasterMapping
+        def columnStarts(start, stop):
+            key = (id(owner), ds.X.ctypes.data, start, stop, m.x_from, m.x_to, m.hbin_from, m.hbin_to)
+            if key not in self.sharedRuns:
+                # The owner is kept so that its id is not reused
+                self.sharedRuns[key] = (owner, m.columnStarts(ds.X, start, stop))
+            return self.sharedRuns[key][1]
+        return columnStarts
+
+    """
+    Returns an iterator over function(item) for all items. The data series do not depend on each
+    other until they are drawn on top of each other, so they are processed by the threads of
+    threadPool() (most of the work is done by numpy which releases the GIL meanwhile).
+    """
+    def mapSeries(self, function, items):
+        if THREADS > 1 and len(items) > 1:
+            return threadPool().map(function, items)
+        return map(function, items)
 
     def plotAll(self):
         # The naive approach here is to plot all lines between data points first (so that they
@@ -523,42 +2054,62 @@ class Grapher(object):
         # crossing the drawing area borders. Furthermore, we only determine if the points are
         # in the drawing area once in this method here (it could be done once more in the
         # mapLine() or map() method but that's not our business here!)
-        # 2. Furthermore, we check if two consecutive points which should be are mapped on the same
-        # pixel. If so, we can skip one of that points and furthermore skip drawing that line. But
-        # as it seems to me that drawing the same point twice yields no performance penalty (I guess
-        # it just corresponds to setting a value in the underlying curses-array), we just draw every
-        # point.
-        for ds in self.seriesList:
-            # First, determine where the data points lie outside of the drawing area
-            outsides = self.mapping.nofit(ds.X, ds.Y)
-            # 1. We can omit a line if two consecutive points share a nofit-direction
-            # We only have to calculate this if we actually want to draw the lines
-            if self.draw_lines:
-                omitlines = outsides[0:-1] & outsides[1:]
-                omitlines = numpy.append(omitlines, 15) # Hack so that the array sizes stay the same for iterating
-            # 2. If two consecutive points are the same, omit the lines, too. To do so,
-            # pre-calculate the mapping values.
-            cols = numpy.empty(outsides.shape) # Pre initialize arrays for the mappings so that they have the
-            rows = numpy.empty(outsides.shape) # same shape as the other array
-            cols[outsides==0] = self.mapping.mapx(ds.X[outsides==0]) # Map the values
-            rows[outsides==0] = self.mapping.mapy(ds.Y[outsides==0])
-            cols = cols.astype(int) # Mapping.map() returns integer arrays but the types are changed when assigning
-            rows = rows.astype(int) # to the bigger arrays. Ensure the types here again.
-            # Try to draw the lines and draw the points
-            for i in range(len(outsides)):
-                # First try to draw the line if it is not obvious that it will not be drawn
-                if self.draw_lines and not omitlines[i] and (rows[i], cols[i])!=(rows[i+1], cols[i+1]):
-                    ax, ay, bx, by = ds.X[i], ds.Y[i], ds.X[i+1], ds.Y[i+1]
-                    DEBUG(str(self.mapping))
-                    DEBUG("{}, {}, {}, {}".format(ax, ay, bx, by))
-                    for col, row in self.mapping.mapLine(ax, ay, bx, by):
-                        self.window.addstr(row, col, "·", curses.color_pair(ds.color))
-                # Then, draw the (current) point
-                if not outsides[i]:
-                    # The value is plottable, map it to a (px, py) plot location.
-                    # col, row = self.mapping.map(ds.X[i],ds.Y[i])
-                    # Plot the point at that location.
-                    self.window.addstr(rows[i], cols[i], "+", curses.color_pair(ds.color))
+        # 2. Even with 1., there is a lot of per-line work left which is too slow in Python.
+        # Therefore, all lines of a series are clipped and rasterized at once by the vectorized
+        # Mapping.mapLines() method. As many lines and points end up in the same cells, each
+        # cell is only written once per series.
+        # 3. All of this is done on the decimated data from decimateAll() only so that the work
+        # does not depend on the number of data points but on the size of the drawing area.
+        # 4. In braille mode, the same is done with the braille dots as bins (see rasterizeBraille()).
+        # 5. The series are rasterized in parallel (see mapSeries()) and their cells are cached in
+        # self.seriesCells. They are drawn on top of each other by compositeSeries().
+        # The cells are only cached once all series are rasterized, so an interrupted redraw (see
+        # checkInterrupt()) does not leave the cells of a part of the series behind.
+        results = list(self.mapSeries(lambda data: self.rasterizeSeries(*data), self.plotData))
+        for (ds, _, _, _), (cells, counters) in zip(self.plotData, results):
+            self.seriesCells[id(ds)] = (ds, ds.version, cells)
+            if counters is not None:
+                self.profiler.add(counters)
+
+    """
+    Rasterizes the data X, Y and the points marks (see decimate()) of the DataSeries ds according
+    to its style and the braille mode.
+    """
+    def rasterizeSeries(self, ds, X, Y, marks=None):
+        self.checkInterrupt()
+        if ds.style == 'density':
+            return self.rasterizeDensity(X, Y)
+        step = ds.style == 'step'
+        if self.braille:
+            return self.rasterizeBraille(X, Y, step, marks)
+        return self.rasterize(X, Y, step, marks)
+
+    """
+    Rasterizes the (decimated) data X, Y of a single DataSeries and returns its cells as a list of
+    (cols, rows, char)-tuples in drawing order plus the counters of mapLines() (None without
+    Profiler). Nothing is drawn here, so this can be done for several series at once.
+    With step, the lines are drawn as steps (see interrupts2signal()). This only needs the
+    decimated data as the steps of the dropped samples are covered by the steps of the kept ones.
+    If the cells marks = (cols, rows) are given, the points are drawn there instead of at X, Y.
+    """
+    def rasterize(self, X, Y, step=False, marks=None):
+        cells = []
+        counters = self.newCounters()
+        # First, determine where the data points lie outside of the drawing area
+        outsides = self.mapping.nofit(X, Y)
+        # Draw the lines first so that they end up behind the points
+        if self.draw_lines:
+            if step:
+                cols, rows = self.mapping.mapLines(*interrupts2signal(X, Y), counters=counters)
+            else:
+                cols, rows = self.mapping.mapLines(X, Y, outsides, counters)
+            cells.append((cols, rows, "·"))
+        # Then, draw the points which are in the drawing area (NaNs are not outside for nofit())
+        if marks is None:
+            inside = (outsides == 0) & numpy.isfinite(X) & numpy.isfinite(Y)
+            marks = self.mapping.mapx(X[inside]), self.mapping.mapy(Y[inside])
+        cells.append(marks + ("+",))
+        return cells, counters
 
         """
         DEPRECATED APPROACH
@@ -583,19 +2134,355 @@ class Grapher(object):
                     self.window.addstr(row, col, "+", curses.color_pair(ds.color))
         """
 
+    """
+    Like rasterize() but for the 'density' style: All samples in the drawing area are counted
+    per cell with a single histogram (numpy.bincount) and each occupied cell gets the glyph of
+    DENSITY_GLYPHS for its count, relative to the maximum count on a logarithmic scale.
+    """
+    def rasterizeDensity(self, X, Y):
+        # Like nofit() == 0 but cheaper for many samples. NaNs are outside, too.
+        mapping = self.mapping
+        left, right = sorted((mapping.x_from, mapping.x_to))
+        bottom, top = sorted((mapping.y_from, mapping.y_to))
+        inside = (X >= left) & (X <= right) & (Y >= bottom) & (Y <= top)
+        cells = mapping.mapy(Y[inside]) * self.width + mapping.mapx(X[inside])
+        counts = numpy.bincount(cells, minlength=self.height * self.width)
+        occupied = numpy.flatnonzero(counts)
+        if len(occupied) == 0:
+            return [], self.newCounters()
+        counts = counts[occupied]
+        levels = numpy.log(counts) / max(numpy.log(counts.max()), 1e-9) * (len(DENSITY_GLYPHS) - 1)
+        rows, cols = numpy.divmod(occupied, self.width)
+        return [(cols, rows, DENSITY_GLYPHS[numpy.round(levels).astype(int)])], self.newCounters()
+
+    """
+    Like rasterize() but with braille characters: The lines and points are rasterized to the
+    dots of the characters and the dots of each cell are collected in a bitmask, so that each
+    occupied cell is drawn once per series.
+    """
+    def rasterizeBraille(self, X, Y, step=False, marks=None):
+        mapping = self.rasterMapping
+        counters = self.newCounters()
+        outsides = mapping.nofit(X, Y)
+        if marks is None:
+            inside = (outsides == 0) & numpy.isfinite(X) & numpy.isfinite(Y)
+            marks = mapping.mapx(X[inside]), mapping.mapy(Y[inside])
+        cols, rows = marks
+        if self.draw_lines:
+            if step:
+                linecols, linerows = mapping.mapLines(*interrupts2signal(X, Y), counters=counters)
+            else:
+                linecols, linerows = mapping.mapLines(X, Y, outsides, counters)
+            cols = numpy.concatenate((cols, linecols))
+            rows = numpy.concatenate((rows, linerows))
+        dots = numpy.zeros((self.height, self.width), dtype=numpy.uint8)
+        numpy.bitwise_or.at(dots, (rows // 4, cols // 2), BRAILLE_DOTS[rows % 4, cols % 2])
+        cellrows, cellcols = numpy.nonzero(dots)
+        return [(cellcols, cellrows, BRAILLE_CHARS[dots[cellrows, cellcols]])], counters
+
+    """
+    Draws the character char with the given color at each cell (cols[i], rows[i]). char can also
+    be an array with one character per cell.
+    """
+    def plotCells(self, cols, rows, char, color):
+        self.seriesLayer.addcells(rows, cols, char, color)
+        if self.profiler is not None:
+            self.profiler.count('cells', len(cols))
+
+    """
+    Returns new counters for mapLines() which are added to the Profiler later or None if there is
+    no Profiler.
+    """
+    def newCounters(self):
+        return None if self.profiler is None else {'segments': 0, 'clipped': 0}
+
     def clearPlotArea(self):
-        self.window.addstr(0, 0, " ")
-        self.window.clrtobot()
+        self.frame = FrameBuffer(self.height, self.width)
+
+    """
+    Everything the rasterized cells of a series depend on besides its data.
+    """
+    def viewKey(self):
+        return (self.height, self.width, self.left, self.right, self.top, self.bottom,
+                self.x_min, self.x_max, self.y_min, self.y_max, self.braille, self.draw_lines)
+
+    """
+    Everything the series layer depends on. As long as this does not change, the layer is valid.
+    """
+    def layerKey(self):
+        return self.viewKey() + ([(id(ds), ds.version, ds.color) for ds in self.seriesList],)
+
+    """
+    Returns the cells of the DataSeries ds from the cache self.seriesCells (see plotAll()) or None
+    if they have not been rasterized for the current data of ds.
+    """
+    def cachedCells(self, ds):
+        entry = self.seriesCells.get(id(ds))
+        if entry is None or entry[0] is not ds or entry[1] != ds.version:
+            return None
+        return entry[2]
+
+    """
+    Moves cells (see rasterize()) by rows and cols and drops the cells which end up outside of
+    the rows top..bottom and columns left..right.
+    """
+    @staticmethod
+    def moveCells(cells, rows, cols, top, bottom, left, right):
+        moved = []
+        for cellcols, cellrows, char in cells:
+            cellcols, cellrows = cellcols + cols, cellrows + rows
+            keep = (cellcols >= left) & (cellcols <= right) & (cellrows >= top) & (cellrows <= bottom)
+            if not isinstance(char, str):
+                char = char[keep]
+            moved.append((cellcols[keep], cellrows[keep], char))
+        return moved
+
+    """
+    Updates self.seriesLayer which is kept between redraws. It is composed of the cells of each
+    DataSeries which are cached for the current view, so only the series which are new or whose
+    data has changed are plotted again. Redraws which do not change the view (e.g. toggling the
+    legend) just keep the layer. If the drawing area has just been moved by scrollx(), the cached
+    cells are moved accordingly and only the uncovered strip is plotted.
+    """
+    def updateSeriesLayer(self):
+        scroll, self.pendingScroll = self.pendingScroll, None
+        key = self.layerKey()
+        if key == self.seriesLayerKey:
+            return
+        # While the layer is changed, it is invalid (in case the redraw is interrupted)
+        self.seriesLayerKey = None
+        # The cells of the last view are kept in the frame cache in case it is requested again. The
+        # cells of the new view might be there, too.
+        previous = self.seriesCells
+        if self.seriesCellsKey != self.viewKey():
+            self.storeView(self.seriesCellsKey, self.seriesCells)
+            self.seriesCells = self.cachedView(self.viewKey())
+            self.seriesCellsKey = self.viewKey()
+        # Only scrolls by less than the drawing area (but not back to the start) leave something to
+        # shift. The glyphs of 'density' series depend on all visible samples, so they can not be
+        # shifted. Neither can the points of series which are drawn differently than in the last
+        # view (see exactMarks()). Nothing has to be shifted if all series are cached for the new view.
+        if scroll is not None and (not scroll[1] or abs(scroll[1]) >= self.right - self.left - 1
+                or any(ds.style == 'density' for ds in self.seriesList)
+                or any(self.exactMarks(ds, scroll[3]) != self.exactMarks(ds, self.mapping) for ds in self.seriesList)
+                or all(self.cachedCells(ds) is not None for ds in self.seriesList)):
+            scroll = None
+        if scroll is None or scroll[2] != key:
+            self.decimateAll(seriesList=[ds for ds in self.seriesList if self.cachedCells(ds) is None])
+            self.plotAll()
+        else:
+            rows, cols, _, _ = scroll
+            # Besides the uncovered strip, the column next to it is plotted again as it has been
+            # the border column before, which only shows half a bin. So is the border column at the
+            # other side which shows a whole bin of the last view. The columns are plotted with the
+            # complete mapping so that they fit to the rest of the layer, but only the data in their
+            # bins has to be considered.
+            top, bottom, left, right = self.top, self.bottom, self.left, self.right
+            if cols < 0:
+                strips = [(right + cols, right), (left, left)]
+                kept = (left + 1, right + cols - 1)
+            else:
+                strips = [(left, left + cols), (right, right)]
+                kept = (left + cols + 1, right - 1)
+            cells = {id(ds): self.moveCells(previous[id(ds)][2], rows, cols, top, bottom, *kept) for ds in self.seriesList}
+            self.seriesCells = {}
+            for first, last in strips:
+                self.decimateAll(self.mapping.restrict(first - .5, last + .5))
+                self.plotAll()
+                for ds in self.seriesList:
+                    cells[id(ds)] += self.moveCells(self.seriesCells.pop(id(ds))[2], 0, 0, top, bottom, first, last)
+            self.seriesCells = {id(ds): (ds, ds.version, cells[id(ds)]) for ds in self.seriesList}
+        # Forget the cells of series which have been removed
+        self.seriesCells = {id(ds): self.seriesCells[id(ds)] for ds in self.seriesList}
+        self.compositeSeries()
+        self.seriesLayerKey = key
+
+    """
+    Keeps the cells of the series for the view with the given key (see viewKey()) in
+    self.frameCache. Only the FRAME_CACHE views which have been used last are kept.
+    """
+    def storeView(self, key, cells):
+        if key is None or not cells:
+            return
+        self.frameCache.pop(key, None)
+        self.frameCache[key] = cells
+        while len(self.frameCache) > FRAME_CACHE:
+            del self.frameCache[next(iter(self.frameCache))]
+
+    """
+    Removes the cells of the series for the view with the given key from self.frameCache and
+    returns them (an empty dict if the view is not cached). As for self.seriesCells, the cells of
+    a series are only used if its data has not changed since (see cachedCells()).
+    """
+    def cachedView(self, key):
+        self.collectPrefetched(key)
+        return self.frameCache.pop(key, {})
+
+    """
+    Starts to rasterize the views which are likely to be requested next in a background thread:
+    the view after another move in the direction of the last one and the next zoom levels. They
+    are put into the frame cache, so the next redraw just takes the cells from there if one of
+    these views is requested. This should only be done if the data does not change meanwhile.
+    """
+    def prefetch(self):
+        for action in (self.lastMove, 'zoominx', 'zoomoutx', 'zoominy', 'zoomouty'):
+            view = self.viewGrapher(*self.peekView(action))
+            key = view.viewKey()
+            if key in self.frameCache or key in self.prefetching:
+                continue
+            generation = self.prefetchGeneration
+            view.inputPending = lambda: self.prefetchGeneration != generation
+            self.prefetching[key] = prefetchPool().submit(view.rasterizeView)
+
+    """
+    Moves the prefetched views into the frame cache. As the view is changing, the prefetching of
+    the other views is stopped. Only the view with the given key is waited for if it is being
+    rasterized right now. The other views which are still rasterized are dropped, they notice that
+    they are stopped (see checkInterrupt()) and finish in the background.
+    """
+    def collectPrefetched(self, key):
+        if not self.prefetching:
+            return
+        if key in self.prefetching and self.prefetching[key].running():
+            concurrent.futures.wait([self.prefetching[key]])
+        self.prefetchGeneration += 1
+        for prefetchedKey, future in self.prefetching.items():
+            if not future.done():
+                future.cancel()
+                continue
+            if future.exception() is not None:
+                DEBUG("Prefetching failed: %r", future.exception())
+                continue
+            self.storeView(prefetchedKey, future.result())
+        self.prefetching = {}
+
+    """
+    Returns the axis limits (x_min, x_max, y_min, y_max) which the method with the given name
+    (e.g. 'zoominx') would set, without changing the view.
+    """
+    def peekView(self, action):
+        state = (self.x_min, self.x_max, self.y_min, self.y_max, self.autoAxis, self.pendingScroll,
+                self.deferRedraws, self.redrawRequested, self.lastMove)
+        self.deferRedraws = True
+        getattr(self, action)()
+        limits = (self.x_min, self.x_max, self.y_min, self.y_max)
+        (self.x_min, self.x_max, self.y_min, self.y_max, self.autoAxis, self.pendingScroll,
+                self.deferRedraws, self.redrawRequested, self.lastMove) = state
+        return limits
+
+    """
+    Returns a Grapher without a terminal which shows the same series as this one with the given
+    axis limits, e.g. to rasterize them in the background (see rasterizeView()).
+    """
+    def viewGrapher(self, x_min, x_max, y_min, y_max):
+        view = Grapher(HeadlessRenderer(self.height, self.width))
+        view.border_left, view.border_bottom = self.border_left, self.border_bottom
+        view.getPlotArea()
+        view.seriesList = list(self.seriesList)
+        view.braille, view.draw_lines = self.braille, self.draw_lines
+        view.setAxis(x_min, x_max, y_min, y_max)
+        view.updateMapping()
+        return view
+
+    """
+    Rasterizes all series for the current mapping and returns their cells (see plotAll()).
+    """
+    def rasterizeView(self):
+        self.decimateAll()
+        self.plotAll()
+        return self.seriesCells
+
+    """
+    Draws the cached cells of all DataSeries into a new self.seriesLayer in the order of
+    self.seriesList.
+    """
+    def compositeSeries(self):
+        self.seriesLayer = FrameBuffer(self.height, self.width)
+        for ds in self.seriesList:
+            for cols, rows, char in self.seriesCells[id(ds)][2]:
+                self.plotCells(cols, rows, char, ds.color)
+
+    """
+    Writes the current frame to the renderer. Only the cells which have changed since the last
+    flushed frame are written. The number of bytes of text written is kept in self.bytes_written.
+    """
+    def flush(self):
+        if self.lastFrame is None or self.lastFrame.glyphs.shape != self.frame.glyphs.shape:
+            # The window contents are unknown (e.g. after resizing), so everything is repainted
+            self.renderer.erase()
+            self.lastFrame = None
+        self.bytes_written = 0
+        written = 0
+        for row, col, text, color, reverse in self.frame.changes(self.lastFrame):
+            self.renderer.write(row, col, text, color, reverse)
+            self.bytes_written += len(text.encode())
+            written += len(text)
+        if self.profiler is not None:
+            self.profiler.count('written', written)
+        self.lastFrame = self.frame.copy()
+        self.renderer.refresh()
 
     def clearData(self):
         self.seriesList = []
 
-    def plot(self, X, Y, label="myData"):
+    def plot(self, X, Y, label="myData", lod=True, xsorted=None, copy=True, style='lines'):
         # Add the new data to the seriesList.
-        self.seriesList.append(DataSeries(numpy.array(X), numpy.array(Y), label, color=self.colorList[len(self.seriesList)]))
-        self.redraw()
+        self.addSeries(DataSeries(X, Y, label, lod=lod, xsorted=xsorted, copy=copy, style=style))
+
+    """
+    Adds an existing DataSeries (without copying its data) so that the Grapher follows changes of
+    the series, e.g. by DataSeries.extend(). Without redraw, the series is only drawn with the next
+    redraw().
+    """
+    def addSeries(self, ds, redraw=True):
+        ds.color = self.colorList[len(self.seriesList) % len(self.colorList)]
+        self.seriesList.append(ds)
+        if redraw:
+            self.redraw()
+
+    """
+    Checks if the data of any series has changed since the last redraw.
+    """
+    def dataChanged(self):
+        return self.drawnVersions != [ds.version for ds in self.seriesList]
+
+    """
+    Redraws everything unless redraws are deferred by self.deferRedraws. Then, the redraw is
+    only remembered in self.redrawRequested so that several changes (e.g. all pending key
+    presses) can be drawn at once.
+    """
+    """
+    Forgets everything which has been rasterized (the series layer, the cells of the series and
+    the views in the frame cache) and redraws the figure from its data.
+    """
+    def replot(self):
+        self.collectPrefetched(None)
+        self.seriesLayerKey = None
+        self.seriesCells = {}
+        self.seriesCellsKey = None
+        self.pendingScroll = None
+        self.frameCache = {}
+        self.requestRedraw()
+
+    def requestRedraw(self):
+        if self.deferRedraws:
+            self.redrawRequested = True
+        else:
+            self.redraw()
+
+    """
+    Aborts the current redraw if self.inputPending() reports new input. Then, the input is
+    handled first and only the resulting view is drawn.
+    """
+    def checkInterrupt(self):
+        if self.inputPending is not None and self.inputPending():
+            raise RedrawInterrupted()
 
     def redraw(self):
+        # Remember the data we are drawing and when
+        self.redrawRequested = False
+        self.drawnVersions = [ds.version for ds in self.seriesList]
+        self.lastRedraw = time.monotonic()
         # Determine the new size of the plotting area
         self.getPlotArea()
         # Clear the screen of any current plots.
@@ -604,111 +2491,620 @@ class Grapher(object):
         self.updateAxis()
         # Update the mapping between x,y and row,col
         self.updateMapping()
+        # Re-plot each DataSeries (reduced to what is visible with that mapping) into its layer.
+        # The terminal is left as it is if new input arrives meanwhile.
+        try:
+            self.checkInterrupt()
+            self.updateSeriesLayer()
+        except RedrawInterrupted:
+            self.redrawRequested = True
+            self.drawnVersions = None
+            return
         # Plot the background grid lines
         self.plotGridlines()
         # Plot axis lines
         self.plotAxis()
-        # Re-plot each DataSeries.
-        self.plotAll()
+        # Put the DataSeries on top
+        self.frame.overlay(self.seriesLayer)
         # Plot the grid points
         self.plotGrid()
         # Update the legend.
         self.updateLegend()
+        self.plotStatistics()
+        # Plot the cursor and the samples next to it
+        self.plotCursor()
+        # Show the profile of the last redraw if enabled
+        self.plotProfile()
+        # Write the changes to the terminal
+        self.flush()
+
+# Moves of the cursor (rows, cols) by the arrow keys, see Grapher.toggleCursor()
+CURSOR_KEYS = {'KEY_UP': (-1, 0), 'KEY_DOWN': (1, 0), 'KEY_LEFT': (0, -1), 'KEY_RIGHT': (0, 1)}
 
 class Figure(object):
-    def __init__(self):
+    def __init__(self, maxfps=MAXFPS):
         self.seriesList = []
+        self.maxfps = maxfps
+        self.profileHooks = []
+        # (X, xsorted) of the copied x values, see storeX()
+        self.storedX = []
 
-    def plot(self, x, y, label=""):
-        self.seriesList.append(DataSeries(x, y, label))
+    """
+    Adds a plot to the figure and returns its DataSeries. With a capacity, the series is a ring
+    buffer which can be fed with new samples by DataSeries.extend() while the figure is shown.
+    Without copy, the series references x and y instead of copying them, see memmapColumns().
+    The style is 'lines', 'step' or 'density', see DataSeries.
+    Instead of samples, x can be a vectorized function like numpy.sin which is sampled for the
+    current view, see FunctionSeries. Then, domain can be given as (x_min, x_max).
+    The x values of series without capacity are only stored once if several series have the
+    same x values (see storeX()). The y values are stored as ydtype, e.g. numpy.float32, if they
+    are precise enough then (see storedType()).
+    """
+    def plot(self, x, y=None, label="", lod=True, xsorted=None, capacity=None, copy=True, style='lines', domain=(None, None), ydtype=None):
+        if callable(x):
+            if y is not None or capacity is not None:
+                raise ValueError("A function is plotted without y values and capacity")
+            ds = FunctionSeries(x, label, x_min=domain[0], x_max=domain[1], style=style)
+        else:
+            ydtype = self.storedType(y, ydtype)
+            if copy and capacity is None:
+                x, xsorted = self.storeX(x, xsorted)
+                y = numpy.array(y, dtype=ydtype)
+                copy = False
+            ds = DataSeries(x, y, label, lod=lod, xsorted=xsorted, capacity=capacity, copy=copy, style=style, ydtype=ydtype)
+        self.seriesList.append(ds)
+        return ds
 
-    def show(self):
-        curses.wrapper(lambda stdscr: self.drawingloop(stdscr))
+    """
+    Returns ydtype if the values y can be stored as ydtype, i.e. if the rounding error of the
+    floating point type ydtype at the biggest value is below the height of a row when the range
+    of the values is shown with PRECISION_ROWS rows. Otherwise, the type of y is kept (None is
+    returned). Of a ring buffer, only the initial values y are checked.
+    """
+    @staticmethod
+    def storedType(y, ydtype):
+        if ydtype is None or not numpy.issubdtype(ydtype, numpy.floating):
+            return ydtype
+        y = numpy.asarray(y)
+        finite = y[numpy.isfinite(y)] if numpy.issubdtype(y.dtype, numpy.inexact) else y
+        if len(finite) == 0:
+            return ydtype
+        low, high = finite.min(), finite.max()
+        if max(abs(low), abs(high)) * numpy.finfo(ydtype).eps <= (high - low) / PRECISION_ROWS:
+            return ydtype
+        DEBUG("The values of the series are kept as %s as %s is not precise enough", y.dtype, numpy.dtype(ydtype))
+        return None
 
-    def drawingloop(self, stdscr):
+    """
+    Returns a read-only copy of the x values x and if they are increasing (if xsorted is None, this
+    is checked). If the same x values have been stored for another series before, their copy is
+    returned instead, so series with the same x values (e.g. several channels of a capture) share
+    them. The series do not change their x values as new samples are appended to new arrays.
+    """
+    def storeX(self, x, xsorted):
+        x = numpy.asarray(x)
+        for X, storedXsorted in self.storedX:
+            if X.shape == x.shape and X.dtype == x.dtype and numpy.array_equal(X, x):
+                return X, storedXsorted if xsorted is None else xsorted
+        X = x.copy()
+        X.flags.writeable = False
+        if xsorted is None:
+            xsorted = DataSeries.isSorted(X)
+        self.storedX.append((X, xsorted))
+        return X, xsorted
+
+    """
+    Returns the number of bytes of memory which are taken by the series of the figure, counting
+    arrays which are shared by several series once (see DataSeries.footprint()).
+    """
+    def footprint(self):
+        arrays = {}
+        for ds in self.seriesList:
+            arrays.update(ds.arrays())
+        return sum(array.nbytes for array in arrays.values())
+
+    """
+    Shows the figure until 'q' is pressed. If update is given, it is called repeatedly while the
+    figure is shown, e.g. to extend the series with new data, which is then drawn with at most
+    maxfps frames per second.
+    """
+    def show(self, update=None):
+        curses.wrapper(lambda stdscr: self.drawingloop(stdscr, update))
+
+    """
+    Adds a function which is called with the profile of each redraw (see Profiler) while the
+    figure is shown or rendered.
+    """
+    def addProfileHook(self, hook):
+        self.profileHooks.append(hook)
+
+    """
+    Renders the figure without a terminal and returns it as plain text (format 'text'), as text
+    with ANSI color codes ('ansi') or as a (height, width) numpy array of glyphs ('glyphs').
+    """
+    def render(self, width=80, height=24, format='text', legend=False):
+        if format not in ('text', 'ansi', 'glyphs'):
+            raise ValueError("Unknown format %r" % (format,))
+        renderer = HeadlessRenderer(height, width)
+        ax = Grapher(renderer)
+        ax.legend = legend
+        for hook in self.profileHooks:
+            ax.addProfileHook(hook)
+        for s in self.seriesList:
+            ax.addSeries(s, redraw=False)
+        ax.redraw()
+        return getattr(renderer, format)()
+
+    def drawingloop(self, stdscr, update=None):
         stdscr.clear()
         curses.curs_set(False)
         ax = Grapher(stdscr)
+        for hook in self.profileHooks:
+            ax.addProfileHook(hook)
         for s in self.seriesList:
-            ax.plot(s.X, s.Y, s.label)
+            ax.addSeries(s, redraw=False)
+        ax.redraw()
+        curses.doupdate()
 
         # DEBUG
         for i in range(0):
             ax.moveup()
 
+        # Without updates, we can just wait for the next key. Otherwise, the input is polled
+        # once per frame so that new data can be drawn in between.
+        frametime = 1 / self.maxfps
+        timeout = -1 if update is None else max(1, int(1000 * frametime))
+        # A redraw is aborted as soon as there is new input (see Grapher.checkInterrupt()). The
+        # key is put back so that it is read by the loop below.
+        def inputPending():
+            stdscr.timeout(0)
+            k = stdscr.getch()
+            if k == -1:
+                return False
+            curses.ungetch(k)
+            return True
+        ax.inputPending = inputPending
         colornum = 0
         while True:
-            k = stdscr.getkey()
-            if k == 'q':
-                break
-            elif k == 'KEY_RESIZE':
+            # All keys which have been pressed meanwhile are handled at once and only the
+            # resulting view is drawn (e.g. when a key is held and the redraws are slower than
+            # the key repeat). An interrupted redraw is continued immediately.
+            keys = self.readKeys(stdscr, 0 if ax.redrawRequested else timeout)
+            if update is not None:
+                update()
+            ax.deferRedraws = True
+            for k in keys:
+                if k == 'q':
+                    return
+                self.handleKey(ax, k)
+            ax.deferRedraws = False
+            if ax.redrawRequested:
                 ax.redraw()
-            elif k == 'r':
+            elif ax.dataChanged() and time.monotonic() - ax.lastRedraw >= frametime:
                 ax.redraw()
-            elif k == 'g':
-                ax.toggleLegend()
-            elif k == 't':
-                ax.toggleTicks()
-            elif k == 'c':
-                ax.toggleLines()
-            elif k == 'l':
-                ax.moveright()
-            elif k == 'h':
-                ax.moveleft()
-            elif k == 'j':
-                ax.movedown()
-            elif k == 'k':
-                ax.moveup()
-            elif k == 'w':
-                ax.zoominy()
-            elif k == 's':
-                ax.zoomouty()
-            elif k == 'a':
-                ax.zoomoutx()
-            elif k == 'd':
-                ax.zoominx()
-            elif k == 'x':
-                ax.autosize()
-            else:
-                stdscr.addstr(0,0,k)
+            curses.doupdate()
+            # While the user looks at a static figure, the next views are prepared
+            if update is None and not ax.redrawRequested:
+                ax.prefetch()
+
+    """
+    Handles the key k (except 'q') for the Grapher ax.
+    """
+    @staticmethod
+    def handleKey(ax, k):
+        if k == 'KEY_RESIZE':
+            ax.requestRedraw()
+        elif k == 'r':
+            ax.replot()
+        elif k == 'g':
+            ax.toggleLegend()
+        elif k == 't':
+            ax.toggleTicks()
+        elif k == 'c':
+            ax.toggleLines()
+        elif k == 'b':
+            ax.toggleBraille()
+        elif k == 'p':
+            ax.toggleProfile()
+        elif k == 'l':
+            ax.moveright()
+        elif k == 'h':
+            ax.moveleft()
+        elif k == 'j':
+            ax.movedown()
+        elif k == 'k':
+            ax.moveup()
+        elif k == 'w':
+            ax.zoominy()
+        elif k == 's':
+            ax.zoomouty()
+        elif k == 'a':
+            ax.zoomoutx()
+        elif k == 'd':
+            ax.zoominx()
+        elif k == 'x':
+            ax.autosize()
+        elif k == 'i':
+            ax.toggleCursor()
+        elif k == 'v':
+            ax.toggleStatistics()
+        elif k in CURSOR_KEYS:
+            ax.moveCursor(*CURSOR_KEYS[k])
+        else:
+            ax.frame.addstr(0,0,k)
+            ax.flush()
+
+    """
+    Returns all keys which have been pressed but not read yet. If there are none, waits for the
+    next key for at most timeout milliseconds (forever if timeout is negative).
+    """
+    @staticmethod
+    def readKeys(stdscr, timeout):
+        keys = []
+        stdscr.timeout(timeout)
+        while True:
+            try:
+                keys.append(stdscr.getkey())
+            except curses.error:
+                return keys
+            stdscr.timeout(0)
+
+# Keys which change the x range. With linked x axes, they are handled by all panels of a Dashboard.
+LINKED_KEYS = ('h', 'l', 'a', 'd', 'x')
+
+"""
+Several figures (panels) which are shown at once in a grid with rows x cols cells. The keys are
+handled by the focused panel, Tab focuses the next one. With linkx, the panels share their x range:
+Moving or zooming in x (or resetting the view) in one panel does the same in all panels. Series in
+different panels with the same x values share one copy of them (see Figure.storeX()), so with
+linkx, the starts of their columns are only looked up once per frame (see Grapher.columnStarts()).
+Each panel is drawn into its own curses window and is only redrawn if its view or its data has
+changed. All changes of a frame are written to the terminal at once.
+"""
+class Dashboard(object):
+    def __init__(self, rows=1, cols=1, linkx=False, maxfps=MAXFPS):
+        self.rows = rows
+        self.cols = cols
+        self.linkx = linkx
+        self.maxfps = maxfps
+        self.panels = [Figure(maxfps) for _ in range(rows * cols)]
+        # The panels share the copies of their x values (see Figure.storeX())
+        for figure in self.panels:
+            figure.storedX = self.panels[0].storedX
+
+    """
+    Returns the Figure of the panel in the given row and column, e.g. to add plots to it.
+    """
+    def panel(self, row, col):
+        return self.panels[row * self.cols + col]
+
+    """
+    Returns the areas (top, left, height, width) of the panels on a screen of the given size.
+    """
+    def layout(self, height, width):
+        return [(row * height // self.rows, col * width // self.cols,
+                (row + 1) * height // self.rows - row * height // self.rows,
+                (col + 1) * width // self.cols - col * width // self.cols)
+                for row in range(self.rows) for col in range(self.cols)]
+
+    """
+    Returns a Grapher for each panel which draws to the given windows.
+    """
+    def graphers(self, windows):
+        graphers = [Grapher(window) for window in windows]
+        for ax, figure in zip(graphers, self.panels):
+            for hook in figure.profileHooks:
+                ax.addProfileHook(hook)
+            for s in figure.seriesList:
+                ax.addSeries(s, redraw=False)
+            if self.linkx:
+                ax.linked = graphers
+        return graphers
+
+    """
+    Redraws the panels which have to be redrawn (or all with force). With linked x axes, they
+    share the column starts of their series.
+    """
+    def redraw(self, graphers, frametime=0, force=False):
+        sharedRuns = {} if self.linkx else None
+        for ax in graphers:
+            ax.sharedRuns = sharedRuns
+            if force or ax.redrawRequested or (ax.dataChanged() and time.monotonic() - ax.lastRedraw >= frametime):
+                ax.redraw()
+            ax.sharedRuns = None
+
+    def show(self, update=None):
+        curses.wrapper(lambda stdscr: self.drawingloop(stdscr, update))
+
+    """
+    Renders the dashboard without a terminal like Figure.render().
+    """
+    def render(self, width=80, height=24, format='text', legend=False):
+        if format not in ('text', 'ansi', 'glyphs'):
+            raise ValueError("Unknown format %r" % (format,))
+        areas = self.layout(height, width)
+        renderers = [HeadlessRenderer(h, w) for _, _, h, w in areas]
+        graphers = self.graphers(renderers)
+        for ax in graphers:
+            ax.legend = legend
+        self.redraw(graphers, force=True)
+        screen = HeadlessRenderer(height, width)
+        for (top, left, h, w), renderer in zip(areas, renderers):
+            for mine, others in ((screen.screen.glyphs, renderer.screen.glyphs),
+                    (screen.screen.colors, renderer.screen.colors), (screen.screen.reverse, renderer.screen.reverse)):
+                mine[top:top+h, left:left+w] = others
+        return getattr(screen, format)()
+
+    def drawingloop(self, stdscr, update=None):
+        stdscr.clear()
+        curses.curs_set(False)
+        # The panels are subwindows sharing the memory of stdscr, so they are redrawn by curses
+        # if stdscr is (e.g. after resizing)
+        def windows():
+            return [stdscr.derwin(h, w, top, left) for top, left, h, w in self.layout(*stdscr.getmaxyx())]
+        graphers = self.graphers(windows())
+        focus = 0
+        graphers[focus].marked = True
+        frametime = 1 / self.maxfps
+        timeout = -1 if update is None else max(1, int(1000 * frametime))
+        def inputPending():
+            stdscr.timeout(0)
+            k = stdscr.getch()
+            if k == -1:
+                return False
+            curses.ungetch(k)
+            return True
+        for ax in graphers:
+            ax.inputPending = inputPending
+        self.redraw(graphers, force=True)
+        curses.doupdate()
+        while True:
+            interrupted = any(ax.redrawRequested for ax in graphers)
+            keys = Figure.readKeys(stdscr, 0 if interrupted else timeout)
+            if update is not None:
+                update()
+            for ax in graphers:
+                ax.deferRedraws = True
+            for k in keys:
+                if k == 'q':
+                    return
+                elif k == 'KEY_RESIZE':
+                    stdscr.clear()
+                    for ax, window in zip(graphers, windows()):
+                        ax.setWindow(window)
+                        ax.requestRedraw()
+                elif k == '\t':
+                    graphers[focus].marked = False
+                    graphers[focus].requestRedraw()
+                    focus = (focus + 1) % len(graphers)
+                    graphers[focus].marked = True
+                    graphers[focus].requestRedraw()
+                elif self.linkx and k in LINKED_KEYS:
+                    # All panels do the same so that they can scroll their layers, but the x range
+                    # of the focused panel is taken in case of rounding differences.
+                    focused = graphers[focus]
+                    Figure.handleKey(focused, k)
+                    for ax in graphers:
+                        if ax is not focused:
+                            Figure.handleKey(ax, k)
+                            if not focused.autoAxis:
+                                ax.x_min, ax.x_max = focused.x_min, focused.x_max
+                else:
+                    Figure.handleKey(graphers[focus], k)
+            for ax in graphers:
+                ax.deferRedraws = False
+            self.redraw(graphers, frametime)
+            curses.doupdate()
+            if update is None and not any(ax.redrawRequested for ax in graphers):
+                for ax in graphers:
+                    ax.prefetch()
 
 def plot(x, y, label=""):
     fig = Figure()
     fig.plot(x, y, label)
     fig.show()
 
+"""
+Maps a raw binary file with interleaved columns of the given dtype (e.g. samples written by a data
+logger) into memory and returns the columns as a list of numpy.memmap views. Nothing is read until
+the views are accessed, so together with Figure.plot(..., copy=False), files which are much bigger
+than the memory can be plotted. The first offset bytes (a header) and an incomplete last row are
+ignored.
+"""
+def memmapColumns(filename, columns=1, dtype=numpy.float64, offset=0):
+    dtype = numpy.dtype(dtype)
+    with open(filename, 'rb') as f:
+        f.seek(0, 2)
+        rows = (f.tell() - offset) // (columns * dtype.itemsize)
+    if rows <= 0:
+        return [numpy.empty(0, dtype=dtype) for _ in range(columns)]
+    data = numpy.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=(rows, columns))
+    return [data[:, i] for i in range(columns)]
+
 """
 Convenience function to convert rising/falling-edge interrupt-timestamps and associated values into a plottable signal.
 Assuming a digital signal that was recorded as (timestamp, value)-pairs while the value describes if we observed
 a rising or a falling edge, this function converts the two lists timestamps and values into two corresponding
-lists which, when plotted, look like the digital signal. In fact, this step only consists of repeating each samples
+arrays which, when plotted, look like the digital signal. In fact, this step only consists of repeating each samples
 value at the timestamp of the next sample so that we get a nice chain of rectangles.
 
-Although this implementation looks a little bit shitty, it is included here as a tribute to my friend learning programming
-right now who had the task to implement this function. Compared to what happens when plotting the values, the inefficiency
-of this implementation here is negligible.
+This started as a tribute to my friend learning programming who had the task to implement this function. By now,
+it is done with numpy so that it also works for captures with millions of edges. To just plot such a capture, the
+expanded form is not needed at all: Figure.plot(timestamps, values, style='step') draws the same signal.
 """
 def interrupts2signal(Zeitpunkte, Werte): # German: Zeitpunkte = timestamps, Werte = values, neu = new
-    # Lists containing the additional points so that the plot ends up nicely
-    Werte_neu=[]
-    Zeitpunkte_neu=[]
-    # Artificial for-loop
-    i=0
-    while i<len(Werte):
-        Werte_neu.append(Werte[i])
-        Zeitpunkte_neu.append(Zeitpunkte[i])
-        if i+1<len(Werte):
-            Werte_neu.append(Werte[i])
-            Zeitpunkte_neu.append(Zeitpunkte[i+1])
-        # Part of the artificial for-loop
-        i=i+1
+    Zeitpunkte = numpy.asarray(Zeitpunkte)
+    Werte = numpy.asarray(Werte)
+    if len(Werte) == 0:
+        return Zeitpunkte[:0].copy(), Werte[:0].copy()
+    # Each sample i is followed by the point (timestamp of sample i+1, value of sample i)
+    Zeitpunkte_neu = numpy.empty(2 * len(Zeitpunkte) - 1, dtype=Zeitpunkte.dtype)
+    Werte_neu = numpy.empty(2 * len(Werte) - 1, dtype=Werte.dtype)
+    Zeitpunkte_neu[0::2] = Zeitpunkte
+    Zeitpunkte_neu[1::2] = Zeitpunkte[1:]
+    Werte_neu[0::2] = Werte
+    Werte_neu[1::2] = Werte[:-1]
     return Zeitpunkte_neu, Werte_neu
 
-if __name__ == '__main__':
-    import numpy
-    import math
-    import time
-    
+"""
+Reads numeric columns from a file descriptor (a file or a pipe) in chunks of chunksize bytes.
+Each chunk is parsed at once by numpy.loadtxt(). Lines which can not be parsed (e.g. headers) or
+which have another number of columns than the first parsable line are skipped. The columns can be
+selected by their indexes.
+"""
+class ColumnReader(object):
+    def __init__(self, fd, delimiter=None, columns=None, chunksize=1 << 20):
+        self.fd = fd
+        self.delimiter = delimiter
+        self.columns = columns
+        self.chunksize = chunksize
+        self.numFields = None
+        self.rest = b''
+        self.eof = False
+
+    """
+    Returns the rows which have been completed by the next chunk as a 2d array or None if there
+    is no complete row (yet). Without block, only data which is available immediately is read.
+    """
+    def read(self, block=True):
+        if self.eof:
+            return None
+        if not block and not select.select([self.fd], [], [], 0)[0]:
+            return None
+        data = os.read(self.fd, self.chunksize)
+        if not data:
+            # The last line does not need a line break
+            self.eof = True
+            data, self.rest = self.rest + b'\n', b''
+        else:
+            data, self.rest = self.rest + data, b''
+        end = data.rfind(b'\n') + 1
+        data, self.rest = data[:end], data[end:]
+        return self.parse(data.decode(errors='replace'))
+
+    """
+    Parses the complete lines text. All columns are parsed (numpy.loadtxt() fails if their number
+    changes), so that the number of columns of each chunk can be compared with self.numFields, the
+    number of columns of the first parsed rows. The columns are selected afterwards.
+    """
+    def parse(self, text):
+        if not text.strip():
+            return None
+        try:
+            rows = numpy.loadtxt(io.StringIO(text), delimiter=self.delimiter, ndmin=2)
+        except ValueError:
+            rows = None
+        if self.numFields is None and rows is not None and len(rows) > 0:
+            self.numFields = rows.shape[1]
+        if rows is None or rows.shape[1] != self.numFields:
+            # Only if there are broken lines or lines with another number of columns, the lines
+            # are checked one by one and the remaining ones are parsed at once again.
+            lines = [line.split('#')[0].strip() for line in text.splitlines()]
+            lines = [line for line in lines if self.numeric(line)]
+            if self.numFields is None and lines:
+                self.numFields = len(lines[0].split(self.delimiter))
+            lines = [line for line in lines if len(line.split(self.delimiter)) == self.numFields]
+            if not lines:
+                return None
+            try:
+                rows = numpy.loadtxt(lines, delimiter=self.delimiter, ndmin=2)
+            except ValueError:
+                return None
+        if len(rows) == 0:
+            return None
+        if self.columns is not None:
+            if max(self.columns) >= self.numFields:
+                return None
+            rows = rows[:, self.columns]
+        return rows
+
+    def numeric(self, line):
+        if not line:
+            return False
+        try:
+            for field in line.split(self.delimiter):
+                float(field)
+        except ValueError:
+            return False
+        return True
+
+"""
+Streams the columns read by a ColumnReader into a Figure: Each column (except xcolumn, whose
+values are used as x values for all others) becomes a ring buffer series with the given capacity
+(no limit with None). Without xcolumn, the number of the row is used as x value. The labels of
+the series are the column indexes after the given label.
+"""
+class ColumnStream(object):
+    def __init__(self, reader, xcolumn=None, capacity=None, style='lines', label=""):
+        self.reader = reader
+        self.label = label
+        self.xcolumn = xcolumn
+        self.capacity = capacity
+        self.style = style
+        self.rows = 0
+        self.seriesList = None
+
+    """
+    Adds the series to the figure as soon as the first rows have been read (blocking) and
+    returns False if there is nothing to plot.
+    """
+    def start(self, figure):
+        rows = None
+        while rows is None and not self.reader.eof:
+            rows = self.reader.read()
+        split = None if rows is None else self.split(rows)
+        if split is None:
+            return False
+        x, columns = split
+        self.seriesList = [figure.plot(x, y, "%scolumn %i" % (self.label, column), capacity=self.capacity,
+                style=self.style) for column, y in columns]
+        return True
+
+    """
+    Appends the rows which are available now. At most a few chunks are read at once so that the
+    figure stays responsive.
+    """
+    def update(self):
+        for _ in range(8):
+            rows = self.reader.read(block=False)
+            if rows is None:
+                return
+            split = self.split(rows)
+            if split is None:
+                continue
+            x, columns = split
+            for ds, (_, y) in zip(self.seriesList, columns):
+                ds.extend(x, y)
+
+    """
+    Returns the x values and the (index, values) of the other columns of rows or None if rows do
+    not have the columns of the first rows (see ColumnReader.parse()) or no x column.
+    """
+    def split(self, rows):
+        if self.seriesList is not None and rows.shape[1] != len(self.seriesList) + (self.xcolumn is not None):
+            return None
+        indexes = list(range(rows.shape[1])) if self.reader.columns is None else list(self.reader.columns)
+        if self.xcolumn is not None and self.xcolumn not in indexes:
+            return None
+        if self.xcolumn is None:
+            x = numpy.arange(self.rows, self.rows + len(rows), dtype=float)
+        else:
+            x = rows[:, indexes.index(self.xcolumn)]
+        self.rows += len(rows)
+        return x, [(index, rows[:, i]) for i, index in enumerate(indexes) if index != self.xcolumn]
+
+"""
+The input of a pipe like 'tail -f log | python -m ncgraph' is moved to another file descriptor,
+which is returned, so that curses can read the keys from the terminal.
+"""
+def terminalInput():
+    data = os.dup(0)
+    tty = os.open('/dev/tty', os.O_RDONLY)
+    os.dup2(tty, 0)
+    os.close(tty)
+    return data
+
+def demo():
     #m = Mapping(-3, 3, 0, 10, -3, 3, 0, 10)
     #m.mapLine(-5,-12, 1,2)
 
@@ -740,3 +3136,57 @@ if __name__ == '__main__':
     time.sleep(1)
     f.show()
 
+"""
+Command line interface: python -m ncgraph [options] [file ...]
+"""
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m ncgraph",
+            description="Plot numeric columns from files or stdin in the terminal. Data from a pipe is "
+            "plotted while it arrives. Without input, a demo is shown.")
+    parser.add_argument('files', nargs='*', help="files to read one after another ('-' or none: stdin)")
+    parser.add_argument('-c', '--columns', type=lambda text: [int(c) for c in text.split(',')],
+            help="comma-separated indexes of the columns to read (default: all)")
+    parser.add_argument('-x', '--xcolumn', type=int,
+            help="index of the column with the x values (default: row number)")
+    parser.add_argument('-d', '--delimiter', help="column delimiter (default: whitespace)")
+    parser.add_argument('-n', '--history', type=int, default=1000000,
+            help="number of rows to keep per column, 0 for all (default: %(default)s)")
+    parser.add_argument('-s', '--style', choices=DataSeries.STYLES, default='lines')
+    parser.add_argument('--demo', action='store_true', help="show the demo")
+    args = parser.parse_args(argv)
+
+    if args.demo or (not args.files and sys.stdin.isatty()):
+        demo()
+        return
+    columns = args.columns
+    if columns is not None and args.xcolumn is not None and args.xcolumn not in columns:
+        columns = [args.xcolumn] + columns
+    capacity = args.history or None
+    fig = Figure()
+    files = [name for name in args.files if name != '-']
+    if len(files) < len(args.files) or not files:
+        try:
+            data = terminalInput()
+        except OSError:
+            parser.exit(1, "No terminal for the keys\n")
+        stream = ColumnStream(ColumnReader(data, args.delimiter, columns), args.xcolumn, capacity,
+                args.style)
+    else:
+        stream = None
+    # Files are read completely before they are shown, stdin while it is shown
+    for name in files:
+        with open(name, 'rb') as f:
+            fileStream = ColumnStream(ColumnReader(f.fileno(), args.delimiter, columns), args.xcolumn,
+                    capacity, args.style, "%s: " % name if len(args.files) > 1 else "")
+            if fileStream.start(fig):
+                while not fileStream.reader.eof:
+                    fileStream.update()
+    if stream is not None and stream.start(fig):
+        fig.show(stream.update)
+    elif fig.seriesList:
+        fig.show()
+    else:
+        parser.exit(1, "Nothing to plot\n")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Regression tests for ncgraph. The figures are drawn without a terminal by a HeadlessRenderer.
+"""
+import threading
+import time
+
+import numpy
+import pytest
+
+import ncgraph
+
+def render(seriesList, braille=False, lines=True, width=80, height=24):
+    renderer = ncgraph.HeadlessRenderer(height, width)
+    ax = ncgraph.Grapher(renderer)
+    ax.braille, ax.draw_lines = braille, lines
+    for ds in seriesList:
+        ax.addSeries(ds, redraw=False)
+    ax.redraw()
+    return renderer.text()
+
+"""
+Integer samples (e.g. Python lists or int16 captures from memmapColumns()) are drawn like the same
+samples as floats.
+"""
+@pytest.mark.parametrize('dtype', [None, numpy.int16, numpy.int64])
+@pytest.mark.parametrize('braille', [False, True])
+def test_integer_samples(dtype, braille):
+    x, y = [0, 1, 2, 3, 4], [0, 1, 4, 9, 16]
+    if dtype is not None:
+        x, y = numpy.array(x, dtype=dtype), numpy.array(y, dtype=dtype)
+    integers = render([ncgraph.DataSeries(x, y, "integers")], braille)
+    floats = render([ncgraph.DataSeries(numpy.array(x, dtype=float), numpy.array(y, dtype=float), "floats")], braille)
+    assert integers == floats
+    assert braille or '+' in integers
+
+"""
+With few samples per column, the decimated series (with and without Pyramid) are drawn exactly
+like all of their samples.
+"""
+@pytest.mark.parametrize('lod', [False, True])
+@pytest.mark.parametrize('style', ['lines', 'step'])
+@pytest.mark.parametrize('lines', [False, True])
+@pytest.mark.parametrize('braille', [False, True])
+def test_decimation_keeps_picture(monkeypatch, lod, style, lines, braille):
+    x = numpy.linspace(0, 20, 3000)
+    y = numpy.sin(x) + numpy.random.default_rng(1).normal(0, .3, len(x))
+    ds = ncgraph.DataSeries(x, y, "noisy", lod=lod, style=style)
+    decimated = render([ds], braille, lines)
+    monkeypatch.setattr(ncgraph.Grapher, 'decimate',
+            lambda self, ds, cull=None: (ds,) + ds.visibleData(self.rasterMapping, cull) + (None,))
+    assert decimated == render([ds], braille, lines)
+
+"""
+A view which is reached by moving the drawing area (which shifts the series layer and only plots the
+uncovered columns) looks like the same view drawn from scratch. The x values are random, so no
+sample lies exactly on the border of a bin in one of the views.
+"""
+@pytest.mark.parametrize('style', ['lines', 'step'])
+@pytest.mark.parametrize('lines', [False, True])
+@pytest.mark.parametrize('braille', [False, True])
+def test_moves_keep_picture(style, lines, braille):
+    rng = numpy.random.default_rng(2)
+    for n in (500, 6000, 100000):
+        x = numpy.sort(rng.uniform(0, 100, n))
+        ds = ncgraph.DataSeries(x, numpy.cumsum(rng.normal(0, 1, n)), "walk", style=style)
+        renderer = ncgraph.HeadlessRenderer(24, 80)
+        ax = ncgraph.Grapher(renderer)
+        ax.braille, ax.draw_lines = braille, lines
+        ax.addSeries(ds, redraw=False)
+        ax.redraw()
+        ax.zoominx()
+        ax.redraw()
+        for move in ('moveright', 'moveright', 'moveleft', 'moveleft', 'moveleft'):
+            getattr(ax, move)()
+            ax.redraw()
+            reference = ncgraph.HeadlessRenderer(24, 80)
+            fresh = ncgraph.Grapher(reference)
+            fresh.braille, fresh.draw_lines = braille, lines
+            fresh.addSeries(ds, redraw=False)
+            fresh.setAxis(ax.x_min, ax.x_max, ax.y_min, ax.y_max)
+            fresh.redraw()
+            assert renderer.text() == reference.text()
+
+"""
+The bounds of a ring buffer series follow the samples in the type in which they are stored, so
+they shrink when its extrema are dropped.
+"""
+def test_ring_buffer_bounds():
+    ds = ncgraph.DataSeries([0], [.3], "float32", capacity=3, ydtype=numpy.float32)
+    assert ds.bounds()[2:] == (numpy.float32(.3), numpy.float32(.3))
+    for x, y in enumerate([.7, .1, .2, .2], 1):
+        ds.extend([x], [y])
+    assert ds.bounds() == ds.reduceBounds(ds.X, ds.Y)
+    assert ds.bounds()[2:] == (numpy.float32(.1), numpy.float32(.2))
+
+"""
+Collecting the prefetched views for a redraw does not wait for the views which are not requested.
+"""
+def test_collect_prefetched_does_not_wait(monkeypatch):
+    renderer = ncgraph.HeadlessRenderer(24, 80)
+    ax = ncgraph.Grapher(renderer)
+    ax.addSeries(ncgraph.DataSeries(numpy.arange(100.), numpy.arange(100.) ** .5, "sqrt"))
+    started, release = threading.Event(), threading.Event()
+    def rasterizeView(view):
+        started.set()
+        release.wait(10)
+        return {}
+    monkeypatch.setattr(ncgraph.Grapher, 'rasterizeView', rasterizeView)
+    ax.prefetch()
+    started.wait(10)
+    begin = time.monotonic()
+    ax.collectPrefetched(None)
+    assert time.monotonic() - begin < 5
+    assert not ax.prefetching
+    release.set()
+
+"""
+Functions with poles or an infinite end of their domain are scaled to their finite values.
+"""
+@pytest.mark.parametrize('function, domain', [(numpy.log, (0, 10)), (lambda x: 1 / x, (-5, 5))])
+def test_function_poles(function, domain):
+    ds = ncgraph.FunctionSeries(function, "pole", x_min=domain[0], x_max=domain[1])
+    assert numpy.isfinite(ds.bounds()).all()
+    assert render([ds]).strip()